@@ -143,6 +143,12 @@ STATIC_ROOT = BASE_DIR / "static-files"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Where generate_static_feeds writes the feeds and sitemap for the web
+# server to serve directly.
+STATIC_FEEDS_ROOT = BASE_DIR / "static-feeds"
+# The scheme of the links in the static feeds and sitemap.
+STATIC_FEEDS_SCHEME = "https"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
@@ -174,6 +180,11 @@ MARTOR_ALTERNATIVE_SEMANTIC_JS_FILE = "fomantic/fomantic-ui-2.8.8.semantic.min.j
 MARTOR_ALTERNATIVE_SEMANTIC_CSS_FILE = "fomantic/fomantic-ui-2.8.8.semantic.min.css"
 MARTOR_ALTERNATIVE_JQUERY_JS_FILE = "fomantic/jquery.min.js"
 
+# Post view tracking
+# The number of seconds between writes of the buffered post views and reads.
+# None writes them immediately.
+VIEW_TRACKING_FLUSH_INTERVAL = 5
+
 
 # Test settings
 TEST_RUNNER = "project.tests.runner.ProjectTestRunner"
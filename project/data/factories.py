@@ -1,4 +1,4 @@
-from datetime import UTC, timedelta
+from datetime import UTC, date, datetime, time, timedelta
 
 import factory
 from django.contrib.auth.models import User
@@ -26,6 +26,18 @@ DATA_END_DATE = timezone.now().replace(
 DATA_START_DATE = DATA_END_DATE - timedelta(days=365 * 2)
 
 
+def set_end_date(end: date):
+    """
+    Generate the data for the two years up to the given date.
+
+    :param end: The last day of the data.
+    :return: None
+    """
+    global DATA_END_DATE, DATA_START_DATE
+    DATA_END_DATE = datetime.combine(end, time.min, tzinfo=UTC)
+    DATA_START_DATE = DATA_END_DATE - timedelta(days=365 * 2)
+
+
 def _header(level=1):
     lead = "#" * level
     return lead + fake.sentence()
@@ -52,8 +64,9 @@ class UserFactory(factory.django.DjangoModelFactory):
 
     first_name = factory.Faker("first_name")
     last_name = factory.Faker("last_name")
-    username = factory.LazyAttribute(
-        lambda o: f"{o.first_name}.{o.last_name}.{fake.pyint(max_value=999)}"
+    # The sequence keeps usernames unique for bulk inserts.
+    username = factory.LazyAttributeSequence(
+        lambda o, n: f"{o.first_name}.{o.last_name}.{n}"
     )
     email = factory.LazyAttribute(lambda o: f"{o.username}@example.com")
     date_joined = factory.LazyFunction(
@@ -0,0 +1,306 @@
+"""
+This file contains the load test of the newsletter's pages.
+
+The site is served by Django's threaded WSGI server on a random local port
+and requested by an asyncio client in the same process. The requests are
+planned up front from a seed, so every run with the same dataset, seed
+and options makes the same requests, only the order in which concurrent
+requests complete varies.
+
+The client and server share a process, so the results are for comparing
+runs against each other rather than for sizing production servers.
+"""
+
+import asyncio
+import math
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from project.newsletter import registry
+from project.newsletter.models import Post
+from project.newsletter.views import LIST_POSTS_PAGE_SIZE
+
+# The share of the requests made to each page.
+MIX = {
+    "landing": 20,
+    "list_posts": 20,
+    "list_posts_deep": 5,
+    "view_post": 40,
+    "feed": 10,
+    "category_feed": 5,
+}
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+@dataclass(frozen=True)
+class PlannedRequest:
+    page: str
+    path: str
+    # The session cookie of a logged in user.
+    session: str | None = None
+
+    @property
+    def name(self):
+        return f"{self.page} ({'user' if self.session else 'anonymous'})"
+
+
+@dataclass
+class Result:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    # Queue the client's connections rather than refusing them.
+    request_queue_size = 1024
+
+
+def count_queries(app):
+    """Wrap the WSGI application to report each request's query count."""
+
+    def application(environ, start_response):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            headers = [*headers, (QUERY_COUNT_HEADER, str(queries))]
+            return start_response(status, headers, exc_info)
+
+        # Each request is handled in its own thread, so this is the
+        # request's connection.
+        with connection.execute_wrapper(count):
+            return app(environ, counted_start_response)
+
+    return application
+
+
+def start_server() -> LoadTestServer:
+    """Serve the site on a random local port in a background thread."""
+    server = LoadTestServer(
+        ("127.0.0.1", 0), QuietWSGIRequestHandler, allow_reuse_address=False
+    )
+    server.set_app(count_queries(get_internal_wsgi_application()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def log_in(users) -> list[Client]:
+    """Log in the users, returning the clients holding their sessions."""
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    return clients
+
+
+def plan_requests(
+    count: int, sessions: list[str], authenticated: float, seed: int
+) -> list[PlannedRequest]:
+    """
+    Plan the requests of the traffic mix.
+
+    :param count: The number of requests.
+    :param sessions: The session cookies of the logged in users.
+    :param authenticated: The share of the requests made by logged in users.
+    :param seed: The seed of the plan.
+    :return: A list of PlannedRequest.
+    """
+    rng = random.Random(seed)
+    posts = Post.objects.published().order_by("id")
+    public_slugs = list(posts.public().values_list("slug", flat=True))
+    slugs = list(posts.values_list("slug", flat=True))
+    categories = list(registry.by_slug())
+    public_pages = math.ceil(len(public_slugs) / LIST_POSTS_PAGE_SIZE)
+    pages = math.ceil(len(slugs) / LIST_POSTS_PAGE_SIZE)
+    list_posts = reverse("newsletter:list_posts")
+
+    planned = []
+    for page in rng.choices(list(MIX), weights=list(MIX.values()), k=count):
+        session = None
+        if sessions and rng.random() < authenticated:
+            session = rng.choice(sessions)
+        last_page = pages if session else public_pages
+        if page == "landing":
+            path = reverse("newsletter:landing")
+        elif page == "list_posts":
+            path = list_posts
+        elif page == "list_posts_deep":
+            path = f"{list_posts}?page={rng.randint(min(2, last_page), last_page)}"
+        elif page == "view_post":
+            slug = rng.choice(slugs if session else public_slugs)
+            path = reverse("newsletter:view_post", kwargs={"slug": slug})
+        elif page == "feed":
+            path = "/rss/"
+        else:
+            path = f"/rss/{rng.choice(categories)}/"
+        planned.append(PlannedRequest(page=page, path=path, session=session))
+    return planned
+
+
+async def fetch(port: int, request: PlannedRequest) -> tuple[int, int, float]:
+    """
+    Make the request over a new connection.
+
+    :return: The status code, query count and latency in seconds.
+    """
+    lines = [
+        f"GET {request.path} HTTP/1.1",
+        f"Host: 127.0.0.1:{port}",
+        "Connection: close",
+    ]
+    if request.session:
+        lines.append(f"Cookie: {settings.SESSION_COOKIE_NAME}={request.session}")
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    # The server closes the connection after the response.
+    response = await reader.read()
+    latency = time.perf_counter() - start
+    writer.close()
+    await writer.wait_closed()
+
+    status_line, *headers = (
+        response.partition(b"\r\n\r\n")[0].decode("latin-1").split("\r\n")
+    )
+    queries = 0
+    for header in headers:
+        name, _, value = header.partition(":")
+        if name.lower() == QUERY_COUNT_HEADER.lower():
+            queries = int(value)
+    return int(status_line.split()[1]), queries, latency
+
+
+async def run_requests(
+    port: int, planned: list[PlannedRequest], concurrency: int
+) -> dict[str, Result]:
+    """
+    Make the requests with up to concurrency requests in flight.
+
+    :return: A mapping of request names to their Result.
+    """
+    results = defaultdict(Result)
+    pending = iter(planned)
+
+    async def worker():
+        for request in pending:
+            result = results[request.name]
+            try:
+                status, queries, latency = await fetch(port, request)
+            except OSError:
+                status = None
+            if status is None or status >= 400:
+                result.errors += 1
+                continue
+            result.latencies.append(latency)
+            result.queries.append(queries)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return dict(results)
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float, float]:
+    """The p50, p95 and p99 of the latencies."""
+    if not latencies:
+        return 0.0, 0.0, 0.0
+    if len(latencies) == 1:
+        return latencies[0], latencies[0], latencies[0]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def format_report(results: dict[str, Result], elapsed: float) -> list[str]:
+    """Format the results as a table with a row per request name."""
+    total = Result(
+        latencies=[value for r in results.values() for value in r.latencies],
+        queries=[value for r in results.values() for value in r.queries],
+        errors=sum(r.errors for r in results.values()),
+    )
+    lines = [
+        f"{'':<30} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'queries':>7}"
+    ]
+    for name, result in [*sorted(results.items()), ("total", total)]:
+        p50, p95, p99 = percentiles(result.latencies)
+        queries = statistics.fmean(result.queries) if result.queries else 0
+        lines.append(
+            f"{name:<30} {len(result.latencies) + result.errors:>8} "
+            f"{result.errors:>6} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} "
+            f"{p99 * 1000:>8.1f} {queries:>7.1f}"
+        )
+    count = len(total.latencies) + total.errors
+    lines.append(f"{count / elapsed:.1f} requests/s over {elapsed:.1f}s")
+    return lines
+
+
+def run(
+    requests: int = 1000,
+    concurrency: int = 10,
+    warmup: int = 50,
+    users: int = 20,
+    authenticated: float = 0.2,
+    seed: int = 2022,
+) -> tuple[dict[str, Result], float]:
+    """
+    Run the load test against the current database.
+
+    :param requests: The number of measured requests.
+    :param concurrency: The number of requests in flight.
+    :param warmup: The number of unmeasured requests made first to fill
+        the caches.
+    :param users: The number of subscribers to log in.
+    :param authenticated: The share of the requests made by logged in users.
+    :param seed: The seed of the request plan.
+    :return: The results by request name and the elapsed seconds.
+    """
+    clients = log_in(
+        User.objects.filter(subscription__isnull=False, is_staff=False).order_by("id")[
+            :users
+        ]
+    )
+    sessions = [
+        client.cookies[settings.SESSION_COOKIE_NAME].value for client in clients
+    ]
+    planned = plan_requests(warmup + requests, sessions, authenticated, seed)
+    server = start_server()
+    # The server's host isn't allowed when DEBUG is off.
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "127.0.0.1"]):
+        try:
+            port = server.server_address[1]
+            asyncio.run(run_requests(port, planned[:warmup], concurrency))
+            start = time.perf_counter()
+            results = asyncio.run(run_requests(port, planned[warmup:], concurrency))
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+            for client in clients:
+                client.logout()
+    return results, elapsed
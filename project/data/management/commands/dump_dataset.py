@@ -0,0 +1,35 @@
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from project.data import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Snapshot the generated dataset so it can be restored with load_dataset.
+
+    Generating a large dataset with fake_data takes minutes, restoring a
+    snapshot takes seconds. A path ending in .sqlite3 copies the whole
+    SQLite database file instead of dumping the generated tables.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", type=Path, help="The snapshot file, e.g. dataset.jsonl.gz."
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, path, database, **options):
+        if snapshot.is_file_copy(path) and connections[database].vendor != "sqlite":
+            raise CommandError(
+                f"{snapshot.SQLITE_SUFFIX} snapshots require an SQLite database."
+            )
+        counts = snapshot.dump(path, using=database)
+        for label, count in counts.items():
+            logger.info(f"Dumped {count} {label} rows.")
+        logger.info(f"Wrote {path}.")
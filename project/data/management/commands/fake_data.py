@@ -1,16 +1,24 @@
 import logging
+import os
+import random
 from contextlib import contextmanager
+from dataclasses import replace
+from datetime import date, timedelta
 
+import factory.random
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from project.data import (
     author,
     category,
+    factories,
     markdown,
     subscribers,
     subscription_notifications,
 )
+from project.data.profiles import PROFILES
+from project.newsletter import search
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +33,56 @@ def log(event):
 
 
 class Command(BaseCommand):
-    """Generate fake data for the newsletter app."""
+    """
+    Generate fake data for the newsletter app.
+
+    The size comes from a profile, which can be adjusted per entity. The
+    same profile, counts, seed and end date generate the same dataset in
+    an empty database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=list(PROFILES), default="small")
+        parser.add_argument(
+            "--posts", type=int, help="The number of image posts and of general posts."
+        )
+        parser.add_argument("--users", type=int, help="The number of subscribers.")
+        parser.add_argument(
+            "--notification-posts",
+            type=int,
+            help="The number of recent posts subscribers were notified of.",
+        )
+        parser.add_argument("--seed", type=int, default=2022)
+        parser.add_argument(
+            "--end-date",
+            type=date.fromisoformat,
+            help="The last day (YYYY-MM-DD) of the data. Defaults to yesterday.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="The number of processes generating post content.",
+        )
 
     def handle(self, *args, **options):
+        profile = replace(
+            PROFILES[options["profile"]],
+            **{
+                field: options[field]
+                for field in ["posts", "users", "notification_posts"]
+                if options[field] is not None
+            },
+        )
+        logger.info(f"Generating {profile} with seed {options['seed']}")
+        # Faker and factory_boy share a generator, but mdgen uses the
+        # random module's.
+        factory.random.reseed_random(options["seed"])
+        random.seed(options["seed"])
+        factories.set_end_date(
+            options["end_date"] or timezone.localdate() - timedelta(days=1)
+        )
+
         with log("Categories"):
             categories = category.generate_data()
 
@@ -36,9 +91,21 @@ class Command(BaseCommand):
                 author.generate_data(),
                 categories.social,
                 [categories.career, categories.family, categories.technical],
+                count=profile.posts,
+                seed=options["seed"],
+                workers=options["workers"],
             )
         with log("Subscribers"):
-            subscribers.generate_data(categories)
+            subscribers.generate_data(categories, count=profile.users)
 
         with log("Subscription Notifications"):
-            subscription_notifications.generate_data()
+            subscription_notifications.generate_data(
+                post_count=profile.notification_posts
+            )
+
+        # The posts were bulk inserted, so the search index receivers
+        # didn't run.
+        if search.is_available():
+            with log("Search index"):
+                search.create_index()
+                search.rebuild()
@@ -0,0 +1,48 @@
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from project.data import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Restore a dataset snapshot written by dump_dataset.
+
+    The database must be migrated. A .sqlite3 snapshot replaces the whole
+    SQLite database, otherwise the generated tables must be empty unless
+    --replace is passed.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="The snapshot file.")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete the rows of the generated tables before loading.",
+        )
+
+    def handle(self, *args, path, database, replace, **options):
+        if not path.exists():
+            raise CommandError(f"{path} doesn't exist.")
+        if snapshot.is_file_copy(path):
+            if connections[database].vendor != "sqlite":
+                raise CommandError(
+                    f"{snapshot.SQLITE_SUFFIX} snapshots require an SQLite database."
+                )
+        elif not replace and snapshot.has_data(database):
+            raise CommandError(
+                "The database already contains data, pass --replace to delete it."
+            )
+        try:
+            counts = snapshot.load(path, using=database, replace=replace)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        for label, count in counts.items():
+            logger.info(f"Loaded {count} {label} rows.")
+        logger.info(f"Restored {path}.")
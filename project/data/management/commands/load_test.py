@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from project.data import loadtest
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Measure the latency, throughput and queries of the newsletter's pages.
+
+    A traffic mix of the landing page, the post list including deep pages,
+    the post pages and the feeds is replayed by anonymous and logged in
+    users against a local server. Run it against a generated dataset,
+    ideally restored with load_dataset so runs can be compared.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="The number of requests in flight.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=50,
+            help="The number of unmeasured requests made first to fill the caches.",
+        )
+        parser.add_argument(
+            "--users", type=int, default=20, help="The number of subscribers to log in."
+        )
+        parser.add_argument(
+            "--authenticated",
+            type=float,
+            default=0.2,
+            help="The share of the requests made by logged in users.",
+        )
+        parser.add_argument("--seed", type=int, default=2022)
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            logger.warning(
+                "DEBUG is on, so the results include the overhead of the debug "
+                "toolbar. Set DEBUG=False for representative numbers."
+            )
+        results, elapsed = loadtest.run(
+            requests=options["requests"],
+            concurrency=options["concurrency"],
+            warmup=options["warmup"],
+            users=options["users"],
+            authenticated=options["authenticated"],
+            seed=options["seed"],
+        )
+        if not results:
+            raise CommandError("No requests were made.")
+        for line in loadtest.format_report(results, elapsed):
+            self.stdout.write(line)
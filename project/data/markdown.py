@@ -1,10 +1,20 @@
-from datetime import timedelta
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
 from itertools import cycle
 
-from project.data.factories import DATA_END_DATE, ImagePostFactory, PostFactory
+import django
+import factory.random
+import faker.generator
+
+from project.data import factories
+from project.data.factories import ImagePostFactory, PostFactory
 from project.newsletter.models import Post
 
 POST_COUNT = 1500
+# The number of posts built from each seed. Changing it changes the data.
+SHARD_SIZE = 500
 
 RECENT_POSTS = [
     (
@@ -30,46 +40,123 @@ RECENT_POSTS = [
 ]
 
 
-def generate_data(user, image_category, post_categories):
-    image_posts = ImagePostFactory.build_batch(
-        POST_COUNT,
-        author=user,
-    )
-    Post.objects.bulk_create(image_posts, batch_size=500, ignore_conflicts=True)
+def _init_worker(end_date: date):
+    # Spawned workers don't inherit the parent's setup.
+    django.setup()
+    factories.set_end_date(end_date)
+
+
+@contextmanager
+def reseeded(seed: int):
+    """Seed the random generators, restoring their states afterwards."""
+    # factory.random.get_random_state() only returns factory_boy's state,
+    # not that of the generator shared by the Faker instances.
+    generators = [factory.random.randgen, faker.generator.random, random]
+    states = [generator.getstate() for generator in generators]
+    factory.random.reseed_random(seed)
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        for generator, state in zip(generators, states, strict=True):
+            generator.setstate(state)
+
+
+def build_shard(args) -> list[Post]:
+    """
+    Build a shard of posts from the seed plus the shard's index.
+
+    The random state is restored afterwards, so the data generated after
+    the posts is the same whether the shards were built in this process
+    or in a worker.
+
+    :param args: A tuple of the factory class, author, seed, shard index
+        and number of posts.
+    :return: The unsaved posts.
+    """
+    factory_class, author, seed, shard, count = args
+    with reseeded(seed + shard):
+        return factory_class.build_batch(count, author=author)
+
+
+def build_posts(batches, author, seed: int, workers: int):
+    """
+    Build the posts in shards across a pool of processes.
+
+    Generating the markdown is CPU bound, so the shards are built in
+    parallel and yielded in order for the caller to insert.
+
+    :param batches: A list of (factory class, count) tuples.
+    :param author: The author of the posts.
+    :param seed: The seed the shard indexes are added to.
+    :param workers: The number of processes. 1 builds them in this process.
+    :return: An iterator of (factory class, posts) tuples, one per shard.
+    """
+    shards = []
+    for factory_class, count in batches:
+        for start in range(0, count, SHARD_SIZE):
+            shards.append(
+                (
+                    factory_class,
+                    author,
+                    seed,
+                    len(shards),
+                    min(SHARD_SIZE, count - start),
+                )
+            )
+    if workers <= 1:
+        for shard in shards:
+            yield shard[0], build_shard(shard)
+        return
+    with multiprocessing.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(factories.DATA_END_DATE.date(),),
+    ) as pool:
+        for shard, posts in zip(shards, pool.imap(build_shard, shards), strict=True):
+            yield shard[0], posts
+
+
+def create_posts(posts, category_cycle) -> list[Post]:
+    """
+    Insert the posts, each in the next category of the cycle.
 
+    The through rows are built from the primary keys returned by
+    bulk_create, so the cost grows with the number of posts inserted
+    rather than the number of posts in the table.
+
+    :param posts: The unsaved posts.
+    :param category_cycle: An iterator of the categories to assign.
+    :return: The saved posts.
+    """
+    posts = Post.objects.bulk_create(posts, batch_size=500)
     category_through = Post.categories.through
     category_through.objects.bulk_create(
         [
-            category_through(category_id=image_category.id, post_id=post_id)
-            for post_id in Post.objects.filter(categories__isnull=True).values_list(
-                "id", flat=True
-            )
+            category_through(category_id=next(category_cycle).id, post_id=post.id)
+            for post in posts
         ],
         batch_size=500,
-        ignore_conflicts=True,
     )
+    return posts
 
-    general_posts = PostFactory.build_batch(
-        POST_COUNT,
-        author=user,
-    )
-    Post.objects.bulk_create(general_posts, batch_size=500, ignore_conflicts=True)
 
-    category_cycle = cycle(post_categories)
-    category_through.objects.bulk_create(
-        [
-            category_through(category_id=next(category_cycle).id, post_id=post_id)
-            for post_id in Post.objects.filter(categories__isnull=True).values_list(
-                "id", flat=True
-            )
-        ],
-        batch_size=500,
-        ignore_conflicts=True,
+def generate_data(
+    user, image_category, post_categories, count=POST_COUNT, seed=2022, workers=1
+):
+    category_cycles = {
+        ImagePostFactory: cycle([image_category]),
+        PostFactory: cycle(post_categories),
+    }
+    built = build_posts(
+        [(ImagePostFactory, count), (PostFactory, count)], user, seed, workers
     )
+    for factory_class, posts in built:
+        create_posts(posts, category_cycles[factory_class])
 
     recent_posts = []
     for day, (first, second) in enumerate(RECENT_POSTS):
-        day_base = DATA_END_DATE - timedelta(days=day)
+        day_base = factories.DATA_END_DATE - timedelta(days=day)
         first_time = day_base + timedelta(hours=10)
         recent_posts.append(
             PostFactory.build(
@@ -91,13 +178,4 @@ def generate_data(user, image_category, post_categories):
                 publish_at=None,
             )
         )
-    Post.objects.bulk_create(recent_posts, ignore_conflicts=True)
-
-    category_cycle = cycle(post_categories)
-    category_through.objects.bulk_create(
-        [
-            category_through(category_id=next(category_cycle).id, post_id=post.id)
-            for post in recent_posts
-        ],
-        ignore_conflicts=True,
-    )
+    create_posts(recent_posts, cycle(post_categories))
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+from project.data import markdown, subscribers, subscription_notifications
+
+
+@dataclass(frozen=True)
+class Profile:
+    """The size of a generated dataset."""
+
+    # The number of image posts and of general posts.
+    posts: int
+    users: int
+    # The number of recent posts every matching subscriber was notified of.
+    notification_posts: int
+
+
+PROFILES = {
+    "small": Profile(
+        posts=markdown.POST_COUNT,
+        users=subscribers.USER_COUNT,
+        notification_posts=subscription_notifications.NOTIFICATION_POST_COUNT,
+    ),
+    "medium": Profile(posts=10_000, users=10_000, notification_posts=100),
+    "large": Profile(posts=100_000, users=100_000, notification_posts=100),
+    "xl": Profile(posts=500_000, users=1_000_000, notification_posts=50),
+}
@@ -0,0 +1,238 @@
+"""
+This file contains the snapshots of generated datasets.
+
+A snapshot is a gzipped JSONL file. Each table starts with a header line,
+``{"model": <label>, "fields": [<columns>]}``, followed by one JSON array
+per row. Tables are written in dependency order and restored with
+multi-row inserts in a single transaction with the constraint checks
+deferred until every table is loaded, the same way loaddata does.
+
+SQLite databases can instead be snapshotted to a ``.sqlite3`` file and
+restored with SQLite's backup API, which copies the pages of the file
+rather than inserting rows.
+"""
+
+import gzip
+import json
+import sqlite3
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from project.newsletter import registry, search, syndication
+from project.newsletter.chunking import iterate_chunks
+from project.newsletter.models import (
+    Category,
+    DailyRollup,
+    NotificationRollup,
+    Post,
+    Subscription,
+    SubscriptionNotification,
+)
+
+# In dependency order.
+MODELS = [
+    User,
+    Category,
+    Post,
+    Post.categories.through,
+    Subscription,
+    Subscription.categories.through,
+    SubscriptionNotification,
+    DailyRollup,
+    NotificationRollup,
+]
+CHUNK_SIZE = 5000
+SQLITE_SUFFIX = ".sqlite3"
+# The fields whose JSON values can be inserted without conversion.
+PLAIN_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "BooleanField",
+    "CharField",
+    "FileField",
+    "ForeignKey",
+    "IntegerField",
+    "OneToOneField",
+    "TextField",
+}
+
+
+def is_file_copy(path: Path) -> bool:
+    """Whether the snapshot is a copy of an SQLite database file."""
+    return path.suffix == SQLITE_SUFFIX
+
+
+def has_data(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Whether any of the snapshotted tables contain rows."""
+    return any(model._base_manager.using(using).exists() for model in MODELS)
+
+
+def _default(value):
+    # Dates and datetimes. The DjangoJSONEncoder truncates microseconds.
+    return value.isoformat()
+
+
+def dump(path: Path, using: str = DEFAULT_DB_ALIAS, chunk_size: int = CHUNK_SIZE):
+    """
+    Write the generated tables to the snapshot.
+
+    :param path: The file to write. A .sqlite3 path copies the database file.
+    :param using: The database alias.
+    :param chunk_size: The number of rows fetched per query.
+    :return: A mapping of model labels to the number of dumped rows.
+    """
+    if is_file_copy(path):
+        connection = connections[using]
+        connection.ensure_connection()
+        with sqlite3.connect(path) as destination:
+            connection.connection.backup(destination)
+        destination.close()
+        return {}
+    counts = {}
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for model in MODELS:
+            # The primary key comes first, as returned by iterate_chunks.
+            fields = [
+                model._meta.pk,
+                *(
+                    field
+                    for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ),
+            ]
+            header = {
+                "model": model._meta.label_lower,
+                "fields": [field.attname for field in fields],
+            }
+            file.write(json.dumps(header) + "\n")
+            counts[header["model"]] = 0
+            for chunk in iterate_chunks(
+                model._base_manager.using(using),
+                *header["fields"][1:],
+                chunk_size=chunk_size,
+            ):
+                file.writelines(
+                    json.dumps(row, default=_default) + "\n" for row in chunk
+                )
+                counts[header["model"]] += len(chunk)
+    return counts
+
+
+def _converter(connection, field):
+    # The dumped dates are always ISO 8601, so they skip the fields' parsing
+    # which accounts for most of the time spent converting.
+    if field.get_internal_type() == "DateTimeField":
+        return lambda value: connection.ops.adapt_datetimefield_value(
+            datetime.fromisoformat(value)
+        )
+    if field.get_internal_type() == "DateField":
+        return lambda value: connection.ops.adapt_datefield_value(
+            date.fromisoformat(value)
+        )
+    return lambda value: field.get_db_prep_save(field.to_python(value), connection)
+
+
+def _insert(connection, model, fields, rows):
+    quote_name = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_name(model._meta.db_table),
+        ", ".join(quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    converters = [
+        (index, _converter(connection, field))
+        for index, field in enumerate(fields)
+        if field.get_internal_type() not in PLAIN_TYPES
+    ]
+    for row in rows:
+        for index, convert in converters:
+            if row[index] is not None:
+                row[index] = convert(row[index])
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _delete(connection):
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in reversed(MODELS):
+            cursor.execute(f"DELETE FROM {quote_name(model._meta.db_table)}")
+
+
+def load(
+    path: Path,
+    using: str = DEFAULT_DB_ALIAS,
+    replace: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+):
+    """
+    Restore the generated tables from the snapshot.
+
+    Rows are inserted with their primary keys as raw values, so the
+    auto_now timestamps and signal receivers are skipped. The sequences
+    and the search index are rebuilt afterwards.
+
+    :param path: The file to read. A .sqlite3 path replaces the database.
+    :param using: The database alias.
+    :param replace: Whether to delete the existing rows of the tables first.
+    :param chunk_size: The number of rows inserted per query.
+    :return: A mapping of model labels to the number of loaded rows.
+    :raises ValueError: If the snapshot contains an unknown model.
+    """
+    connection = connections[using]
+    if is_file_copy(path):
+        connection.ensure_connection()
+        with sqlite3.connect(path) as source:
+            source.backup(connection.connection)
+        source.close()
+        _invalidate()
+        return {}
+    models = {model._meta.label_lower: model for model in MODELS}
+    counts = {}
+    with (
+        transaction.atomic(using),
+        connection.constraint_checks_disabled(),
+        gzip.open(path, "rt", encoding="utf-8") as file,
+    ):
+        if replace:
+            _delete(connection)
+        model = fields = None
+        lines = (json.loads(line) for line in file)
+        while batch := list(islice(lines, chunk_size)):
+            rows = []
+            for line in batch:
+                if isinstance(line, list):
+                    rows.append(line)
+                    continue
+                if rows:
+                    _insert(connection, model, fields, rows)
+                    counts[model._meta.label_lower] += len(rows)
+                    rows = []
+                if (model := models.get(line["model"])) is None:
+                    raise ValueError(f"Unknown model {line['model']!r}.")
+                fields = [model._meta.get_field(name) for name in line["fields"]]
+                counts[model._meta.label_lower] = 0
+            if rows:
+                _insert(connection, model, fields, rows)
+                counts[model._meta.label_lower] += len(rows)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in MODELS]
+        )
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+            cursor.execute(sql)
+    if search.is_available(using):
+        search.create_index(using)
+        search.rebuild(using)
+    _invalidate()
+    return counts
+
+
+def _invalidate():
+    registry.invalidate()
+    syndication.invalidate()
@@ -1,21 +1,29 @@
 from collections import OrderedDict
 from functools import partial
 
+from django.contrib.auth.models import User
+from django.db.models import Max
 from faker import Faker
 
 from project.data.category import CategoryData
-from project.data.factories import SubscriptionFactory, UserFactory
+from project.data.factories import UserFactory
 from project.newsletter.models import Subscription
 
 fake = Faker()
 Faker.seed(2022)
 
 USER_COUNT = 100
+BATCH_SIZE = 10_000
 
 
-def generate_data(categories: CategoryData):
-    users = UserFactory.create_batch(USER_COUNT)
+def generate_data(categories: CategoryData, count: int = USER_COUNT):
+    """
+    Create users with subscriptions to a random selection of categories.
 
+    Users are inserted in batches and each batch's subscriptions and
+    category through rows are built from the primary keys returned by
+    bulk_create, so there are no queries per user.
+    """
     category_ids = OrderedDict(
         [
             (categories.career.id, 0.3),
@@ -24,22 +32,26 @@ def generate_data(categories: CategoryData):
             (categories.technical.id, 0.7),
         ]
     )
-    category_map = {
-        categories.career.id: categories.career,
-        categories.family.id: categories.family,
-        categories.social.id: categories.social,
-        categories.technical.id: categories.technical,
-    }
     get_category_ids = partial(fake.random_elements, elements=category_ids, unique=True)
+    category_through = Subscription.categories.through
 
-    for user in users:
-        if Subscription.objects.filter(user=user).exists():
-            continue
-        selected_category_ids = get_category_ids()
-        selected_categories = [category_map[cid] for cid in selected_category_ids]
-        SubscriptionFactory(
-            user=user,
-            created=user.date_joined,
-            updated=user.date_joined,
-            categories=selected_categories,
+    # Continue the username sequence after any existing users.
+    UserFactory.reset_sequence(
+        (User.objects.aggregate(last_id=Max("id"))["last_id"] or 0) + 1
+    )
+    for start in range(0, count, BATCH_SIZE):
+        users = User.objects.bulk_create(
+            UserFactory.build_batch(min(BATCH_SIZE, count - start))
+        )
+        subscriptions = Subscription.objects.bulk_create(
+            [Subscription(user_id=user.id, created=user.date_joined) for user in users]
+        )
+        category_through.objects.bulk_create(
+            [
+                category_through(
+                    subscription_id=subscription.id, category_id=category_id
+                )
+                for subscription in subscriptions
+                for category_id in get_category_ids()
+            ]
         )
@@ -1,14 +1,24 @@
+from itertools import islice
+
 from django.db.models import F
 
-from project.data.factories import SubscriptionNotificationFactory
 from project.newsletter.models import Post, Subscription, SubscriptionNotification
 
+NOTIFICATION_POST_COUNT = 100
+BATCH_SIZE = 10_000
+
 
-def generate_data():
-    posts = list(Post.objects.published().recent_first()[:100])
+def generate_data(post_count: int = NOTIFICATION_POST_COUNT):
+    """
+    Create sent notifications of the most recent posts for the subscribers.
+
+    The existing notifications are fetched once per post rather than
+    checked per subscription, and the new ones are inserted in batches.
+    """
+    posts = list(Post.objects.published().recent_first()[:post_count])
     date = max(p.publish_date for p in posts)
 
-    subscriber_ids = (
+    subscriber_ids = list(
         Subscription.objects.filter(
             categories__posts__in=posts,
             user__date_joined__lte=date,
@@ -17,25 +27,27 @@ def generate_data():
         .distinct()
     )
 
-    notifications = []
-    for subscription_id in subscriber_ids:
-        for post in posts:
-            if not SubscriptionNotification.objects.filter(
-                post=post, subscription_id=subscription_id
-            ).exists():
-                notifications.append(
-                    SubscriptionNotificationFactory.build(
-                        post=post,
-                        subscription_id=subscription_id,
-                        sent=date,
-                    )
-                )
-
-    SubscriptionNotification.objects.bulk_create(notifications, batch_size=10000)
-    SubscriptionNotification.objects.filter(post__in=posts).update(
-        created=F("sent"),
-        updated=F("sent"),
-    )
+    for post in posts:
+        existing = set(
+            SubscriptionNotification.objects.filter(post=post).values_list(
+                "subscription_id", flat=True
+            )
+        )
+        notifications = (
+            SubscriptionNotification(
+                post_id=post.id,
+                subscription_id=subscription_id,
+                sent=date,
+                created=date,
+            )
+            for subscription_id in subscriber_ids
+            if subscription_id not in existing
+        )
+        while batch := list(islice(notifications, BATCH_SIZE)):
+            SubscriptionNotification.objects.bulk_create(batch)
+
+    # updated is set by auto_now, so it can only be backdated by an update.
+    SubscriptionNotification.objects.filter(post__in=posts).update(updated=F("sent"))
     Post.objects.filter(id__in=[post.id for post in posts]).update(
         notifications_sent=date
     )
@@ -1,5 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Max, Prefetch
+from django.utils.functional import cached_property
 
+from project.newsletter import operations, search
 from project.newsletter.models import (
     Category,
     Post,
@@ -30,16 +35,43 @@ class PostAdmin(admin.ModelAdmin):
     ordering = ["-created"]
     raw_id_fields = ["author"]
     readonly_fields = ["created", "updated"]
+    actions = ["publish", "unpublish"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .prefetch_related(
+                Prefetch("categories", queryset=Category.objects.order_by("title"))
+            )
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index rather than scanning every post's content.
+        if search.is_available(queryset.db) and (
+            query := search.match_query(search_term)
+        ):
+            return queryset.filter(id__in=search.matching_ids(query)), False
+        return super().get_search_results(request, queryset, search_term)
 
     @admin.decorators.display(description="Categories")
     def categories_list(self, obj):
-        return ", ".join(
-            category.title for category in obj.categories.order_by("title")
-        )
+        # Use .all() to make use of the prefetched categories.
+        return ", ".join(category.title for category in obj.categories.all())
 
     def get_changeform_initial_data(self, request):
         return {"author": request.user}
 
+    @admin.action(description="Publish selected posts")
+    def publish(self, request, queryset):
+        count = operations.set_published(queryset, True)
+        self.message_user(request, f"Published {count} posts.", messages.SUCCESS)
+
+    @admin.action(description="Unpublish selected posts")
+    def unpublish(self, request, queryset):
+        count = operations.set_published(queryset, False)
+        self.message_user(request, f"Unpublished {count} posts.", messages.SUCCESS)
+
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
@@ -49,6 +81,9 @@ class SubscriptionAdmin(admin.ModelAdmin):
     raw_id_fields = ["user"]
     readonly_fields = ["created", "updated"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("categories")
+
     @admin.decorators.display(description="Categories")
     def categories_list(self, obj):
         return ", ".join(category.title for category in obj.categories.all())
@@ -58,12 +93,87 @@ class SubscriptionAdmin(admin.ModelAdmin):
         return obj.user.email
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that stops counting after count_limit rows.
+
+    Beyond the limit the count of an unfiltered list is estimated from the
+    largest primary key, which is an index lookup rather than a full count.
+    The estimate only applies to unfiltered lists, since filters can match
+    far fewer rows than the primary keys suggest. Filtered lists are capped
+    at count_limit and marked as capped.
+    """
+
+    count_limit = 10_000
+    capped = False
+
+    @cached_property
+    def count(self):
+        count = self.object_list[: self.count_limit + 1].count()
+        if count <= self.count_limit:
+            return count
+        if self.object_list.query.has_filters():
+            self.capped = True
+            return self.count_limit
+        estimate = self.object_list.order_by().aggregate(estimate=Max("pk"))
+        return max(count, estimate["estimate"] or 0)
+
+
+class SeekChangeList(ChangeList):
+    """
+    A ChangeList that links to the rows after the current page by primary key.
+
+    Filtering on pk__lt of the page's last row lets the database seek
+    through the primary key rather than skip every row before an OFFSET.
+    This requires the admin to order by -pk.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        self.seek_query_string = None
+        if len(self.result_list) == self.list_per_page and ORDER_VAR not in self.params:
+            self.seek_query_string = self.get_query_string(
+                {"id__lt": self.result_list[-1].pk}, remove=[PAGE_VAR]
+            )
+        self.seek_newest_query_string = None
+        if "id__lt" in self.params:
+            self.seek_newest_query_string = self.get_query_string(
+                remove=["id__lt", PAGE_VAR]
+            )
+
+
 @admin.register(SubscriptionNotification)
 class SubscriptionNotificationAdmin(admin.ModelAdmin):
     list_display = ["user_email", "post", "sent", "created"]
     list_select_related = ["subscription__user", "post"]
+    list_filter = [("sent", admin.EmptyFieldListFilter), "created"]
+    date_hierarchy = "sent"
+    ordering = ["-id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     raw_id_fields = ["post", "subscription"]
     readonly_fields = ["created", "updated"]
+    actions = ["mark_read", "resend"]
+
+    def get_changelist(self, request, **kwargs):
+        return SeekChangeList
+
+    @admin.action(description="Mark selected notifications as read")
+    def mark_read(self, request, queryset):
+        count = operations.mark_notifications_read(queryset)
+        self.message_user(
+            request, f"Marked {count} notifications as read.", messages.SUCCESS
+        )
+
+    @admin.action(description="Re-send selected notifications")
+    def resend(self, request, queryset):
+        count = operations.resend_notifications(queryset)
+        self.message_user(
+            request,
+            f"Queued {count} notifications to be sent again.",
+            messages.SUCCESS,
+        )
 
     @admin.decorators.display(ordering="subscription__user__email")
     def user_email(self, obj):
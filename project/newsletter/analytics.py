@@ -0,0 +1,83 @@
+"""
+This file contains helpers for the notification read latency histograms.
+
+Latencies, the time between a notification being sent and read, are
+counted in fixed buckets so that histograms can be summed across posts
+and categories and percentiles can be estimated without the raw values.
+"""
+
+from datetime import timedelta
+
+# The exclusive upper bound of each bucket. The final bucket holds the
+# latencies above the last bound.
+LATENCY_BUCKETS = [
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+    timedelta(minutes=30),
+    timedelta(hours=1),
+    timedelta(hours=3),
+    timedelta(hours=6),
+    timedelta(hours=12),
+    timedelta(days=1),
+    timedelta(days=2),
+    timedelta(days=7),
+    timedelta(days=30),
+]
+PERCENTILES = [50, 90, 99]
+
+
+def empty_histogram() -> list[int]:
+    return [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def merge_histograms(histograms) -> list[int]:
+    """
+    Sum the histograms bucket by bucket.
+
+    :param histograms: An iterable of histograms.
+    :return: The combined histogram.
+    """
+    merged = empty_histogram()
+    for histogram in histograms:
+        for index, count in enumerate(histogram):
+            merged[index] += count
+    return merged
+
+
+def percentile(histogram: list[int], percent: int) -> timedelta | None:
+    """
+    Estimate the latency percentile as the upper bound of its bucket.
+
+    :param histogram: The latency histogram.
+    :param percent: The percentile to estimate, 0-100.
+    :return: The bucket's upper bound, the final bucket's lower bound if it's
+        in the final bucket or None if the histogram is empty.
+    """
+    if not (total := sum(histogram)):
+        return None
+    threshold = total * percent / 100
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        cumulative += count
+        if cumulative >= threshold:
+            break
+    return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+
+
+def summarize(sent: int, read: int, histogram: list[int]) -> dict:
+    """
+    Summarize the notifications for display.
+
+    :param sent: The number of sent notifications.
+    :param read: The number of read notifications.
+    :param histogram: The read latency histogram.
+    :return: A dict of the sent and read counts, the open rate percentage
+        and the latency percentiles.
+    """
+    return {
+        "sent": sent,
+        "read": read,
+        "open_rate": round(read / sent * 100, 1) if sent else 0,
+        **{f"p{percent}": percentile(histogram, percent) for percent in PERCENTILES},
+    }
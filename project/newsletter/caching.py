@@ -0,0 +1,166 @@
+"""
+This file contains helpers for rebuilding cached values without a stampede
+and for invalidating groups of cached values at once.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# How long a lock is held before another worker may attempt a rebuild.
+LOCK_TIMEOUT = 30
+# How long past its expiry a value is kept around to be served stale.
+STALE_TIMEOUT = 300
+# Higher values refresh earlier. 1.0 is the recommended default for XFetch.
+EARLY_REFRESH_BETA = 1.0
+# How long a worker without a stale value waits on another worker's rebuild.
+WAIT_TIMEOUT = 2.0
+WAIT_INTERVAL = 0.05
+
+
+@dataclass
+class CachedValue:
+    """A cached value with the metadata needed for early refreshes."""
+
+    value: Any
+    expires: float
+    # The number of seconds the last rebuild took.
+    delta: float
+
+
+def lock_key(key: str) -> str:
+    return f"{key}.lock"
+
+
+def should_refresh(entry: CachedValue, now: float, beta=EARLY_REFRESH_BETA) -> bool:
+    """
+    Determine if the entry should be rebuilt before it expires.
+
+    This is the XFetch algorithm. The closer the entry is to expiring and
+    the longer it takes to rebuild, the more likely a refresh becomes.
+    """
+    return now - entry.delta * beta * math.log(1 - random.random()) >= entry.expires
+
+
+def set_value(key: str, value: Any, timeout: int, delta: float = 0.0):
+    """
+    Store the value so that it can be served stale after it expires.
+
+    :param key: The cache key.
+    :param value: The value to cache.
+    :param timeout: The number of seconds the value is considered fresh.
+    :param delta: The number of seconds it took to build the value.
+    :return: None
+    """
+    cache.set(
+        key,
+        CachedValue(value=value, expires=time.time() + timeout, delta=delta),
+        timeout=timeout + STALE_TIMEOUT,
+    )
+
+
+def get_version(key: str) -> int:
+    """
+    Fetch the version to include in the keys of a group of cached values.
+
+    :param key: The cache key of the group's version.
+    :return: The current version.
+    """
+    return cache.get_or_set(key, time.time_ns(), timeout=None)
+
+
+def bump_version(key: str):
+    """
+    Invalidate the group of cached values by changing its version.
+
+    The old values are left to expire rather than deleted one by one. A
+    missing version starts from the current time so it can't repeat a
+    version that was evicted.
+
+    :param key: The cache key of the group's version.
+    :return: None
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def run_in_background(func: Callable, *args) -> threading.Thread:
+    """
+    Call the function in a daemon thread.
+
+    The thread's database connections are closed once the function returns.
+    """
+
+    def target():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception(f"Unable to run {func} in the background.")
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def _rebuild(key: str, rebuild: Callable[[], Any], timeout: int):
+    """Rebuild and store the value, then release the key's lock."""
+    try:
+        start = time.monotonic()
+        value = rebuild()
+        set_value(key, value, timeout, delta=time.monotonic() - start)
+        return value
+    finally:
+        cache.delete(lock_key(key))
+
+
+def get_or_rebuild(
+    key: str, rebuild: Callable[[], Any], timeout: int, background: bool = False
+):
+    """
+    Fetch the value for the key, rebuilding it with a single worker.
+
+    Only the worker that acquires the lock calls rebuild. Other workers
+    serve the stale value while that happens. When there is no stale value,
+    they wait briefly for the rebuilt value before rebuilding it themselves.
+
+    :param key: The cache key.
+    :param rebuild: A callable returning the fresh value.
+    :param timeout: The number of seconds the value is considered fresh.
+    :param background: If True and there's a stale value, the worker that
+        acquires the lock also serves the stale value and rebuilds it in a
+        background thread.
+    :return: The cached or rebuilt value.
+    """
+    entry = cache.get(key)
+    if entry is not None and not should_refresh(entry, time.time()):
+        return entry.value
+
+    if cache.add(lock_key(key), True, timeout=LOCK_TIMEOUT):
+        if background and entry is not None:
+            run_in_background(_rebuild, key, rebuild, timeout)
+            return entry.value
+        return _rebuild(key, rebuild, timeout)
+
+    if entry is not None:
+        return entry.value
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        if (entry := cache.get(key)) is not None:
+            return entry.value
+    return rebuild()
@@ -0,0 +1,30 @@
+"""
+This file contains the keyset iteration of querysets in chunks.
+
+It's shared by the bulk updates, the exports and the dataset snapshots,
+so it only depends on the querysets it's given.
+"""
+
+CHUNK_SIZE = 1000
+
+
+def iterate_chunks(queryset, *fields, chunk_size=CHUNK_SIZE):
+    """
+    Iterate over the queryset's primary keys and fields in chunks.
+
+    Each chunk is fetched with pk > the previous chunk's last pk rather than
+    OFFSET, so every chunk costs the same no matter how deep into the table
+    it is and updating the previous chunk's rows doesn't shift the next.
+
+    :param queryset: The queryset to iterate over.
+    :param fields: The fields to fetch after the primary key.
+    :param chunk_size: The number of rows fetched per query.
+    :return: An iterator of lists of (pk, *fields) tuples, ordered by pk.
+    """
+    rows = queryset.order_by("pk").values_list("pk", *fields)
+    chunk = list(rows[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk = list(rows.filter(pk__gt=chunk[-1][0])[:chunk_size])
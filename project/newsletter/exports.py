@@ -0,0 +1,85 @@
+"""
+This file contains the streaming exports of the notification log.
+
+Rows are fetched in keyset chunks with chunking.iterate_chunks, so
+only one chunk is held in memory at a time.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+
+from project.newsletter.chunking import iterate_chunks
+from project.newsletter.models import SubscriptionNotification
+
+CHUNK_SIZE = 2000
+NOTIFICATION_FIELDS = [
+    "id",
+    "post_slug",
+    "post_title",
+    "email",
+    "created",
+    "sent",
+    "read",
+]
+
+
+def iterate_notifications(chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Iterate over the notifications joined with their post and user's email.
+
+    :param chunk_size: The number of rows fetched per query.
+    :return: An iterator of tuples matching NOTIFICATION_FIELDS.
+    """
+    for chunk in iterate_chunks(
+        SubscriptionNotification.objects.all(),
+        "post__slug",
+        "post__title",
+        "subscription__user__email",
+        "created",
+        "sent",
+        "read",
+        chunk_size=chunk_size,
+    ):
+        for row in chunk:
+            yield tuple(
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in row
+            )
+
+
+class Echo:
+    """An object that implements just the write method of the file-like interface."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Format the rows as CSV lines with a header.
+
+    :param rows: The rows matching NOTIFICATION_FIELDS.
+    :return: An iterator of lines.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(NOTIFICATION_FIELDS)
+    for row in rows:
+        yield writer.writerow(["" if value is None else value for value in row])
+
+
+def jsonl_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Format the rows as JSON objects, one per line.
+
+    :param rows: The rows matching NOTIFICATION_FIELDS.
+    :return: An iterator of lines.
+    """
+    for row in rows:
+        yield json.dumps(dict(zip(NOTIFICATION_FIELDS, row, strict=True))) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "jsonl": (jsonl_lines, "application/jsonl"),
+}
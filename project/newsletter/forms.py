@@ -1,17 +1,34 @@
 from django import forms
 
-from project.newsletter.models import Category, Post, Subscription
+from project.newsletter import registry
+from project.newsletter.models import Post, Subscription
 
 
 class SubscriptionForm(forms.ModelForm):
-    categories = forms.ModelMultipleChoiceField(
-        queryset=Category.objects.all(), to_field_name="slug"
-    )
+    # The choices come from the category registry rather than a queryset.
+    categories = forms.MultipleChoiceField(choices=registry.choices)
 
     class Meta:
         model = Subscription
         fields = ["categories"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            categories = registry.by_id()
+            self.initial["categories"] = [
+                categories[id].slug
+                for id in self.instance.categories.through.objects.filter(
+                    subscription=self.instance
+                ).values_list("category_id", flat=True)
+                if id in categories
+            ]
+
+    def clean_categories(self):
+        """Convert the slugs into the category ids to save."""
+        categories = registry.by_slug()
+        return [categories[slug].id for slug in self.cleaned_data["categories"]]
+
 
 class PostForm(forms.ModelForm):
     class Meta:
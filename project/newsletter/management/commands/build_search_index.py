@@ -0,0 +1,24 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.newsletter import search
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the post search index from scratch.
+
+    The index is kept up to date as posts are saved, so this is only needed
+    after changes that bypass the model signals, such as bulk inserts or
+    queryset updates.
+    """
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("The database doesn't support full-text search.")
+        search.create_index()
+        count = search.rebuild()
+        logger.info(f"Indexed {count} posts.")
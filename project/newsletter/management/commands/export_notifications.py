@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from project.newsletter import exports
+
+
+class Command(BaseCommand):
+    """Export the notification log as CSV or JSONL."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument(
+            "--output",
+            help="The file to write to. Defaults to stdout.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=exports.CHUNK_SIZE,
+            help="The number of rows fetched per query.",
+        )
+
+    def handle(self, *args, **options):
+        lines, _ = exports.FORMATS[options["format"]]
+        rows = exports.iterate_notifications(chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines(rows))
+        else:
+            for line in lines(rows):
+                self.stdout.write(line, ending="")
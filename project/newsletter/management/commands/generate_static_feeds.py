@@ -0,0 +1,152 @@
+import itertools
+import logging
+import os
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+
+from project.newsletter import registry
+from project.newsletter.models import Post
+from project.newsletter.syndication import (
+    RecentCategorizedPostsFeed,
+    RecentPostsFeed,
+)
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of URLs in a sitemap file, per the sitemap protocol.
+SITEMAP_MAX_URLS = 50_000
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class StaticFeedRequest(HttpRequest):
+    """A GET request for rendering a feed outside of a web request."""
+
+    def __init__(self, path: str, scheme: str):
+        super().__init__()
+        self.method = "GET"
+        self.path = self.path_info = path
+        self._scheme = scheme
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+class Command(BaseCommand):
+    """
+    Write the feeds and a sitemap of the public posts to static files.
+
+    The files are laid out to match the site's URLs, so the web server
+    can serve rss/index.xml for /rss/ without reaching Django. Each file is
+    written to a temporary file and moved into place so a partially
+    written file is never served.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="The directory to write to. Defaults to STATIC_FEEDS_ROOT.",
+        )
+
+    def write_file(self, path: Path, chunks):
+        """Write the chunks of text to the path atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, delete=False, encoding="utf-8"
+        ) as file:
+            file.writelines(chunks)
+        # Temporary files are only readable by their owner.
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+
+    def write_feeds(self, output: Path, scheme: str) -> int:
+        """
+        Render the feeds with get_feed() rather than calling the views.
+
+        The views would serve and fill the cached bodies of the live feeds,
+        so the files could get another scheme's links and the live feeds
+        this scheme's.
+        """
+        feeds = [("rss/", RecentPostsFeed(), {})] + [
+            (f"rss/{slug}/", RecentCategorizedPostsFeed(), {"slug": slug})
+            for slug in registry.by_slug()
+        ]
+        for path, feed, kwargs in feeds:
+            request = StaticFeedRequest(f"/{path}", scheme)
+            feedgen = feed.get_feed(feed.get_object(request, **kwargs), request)
+            self.write_file(output / path / "index.xml", [feedgen.writeString("utf-8")])
+        return len(feeds)
+
+    def iterate_sitemap_urls(self, domain: str, scheme: str):
+        """Stream the url elements of every public post."""
+        posts = Post.objects.published().public().order_by("id").only("slug", "updated")
+        for post in posts.iterator(chunk_size=2000):
+            location = escape(f"{scheme}://{domain}{post.get_absolute_url()}")
+            yield (
+                f"<url><loc>{location}</loc>"
+                f"<lastmod>{post.updated.date().isoformat()}</lastmod></url>\n"
+            )
+
+    def write_sitemaps(self, output: Path, domain: str, scheme: str) -> int:
+        """
+        Write the sitemap, splitting it into parts with an index when needed.
+
+        The URLs are streamed into each part so the archive is never held
+        in memory. Parts left over from a previous run are removed.
+        """
+        urls = self.iterate_sitemap_urls(domain, scheme)
+        parts = []
+        # Peek at the next URL so a full last part isn't followed by an empty one.
+        first = next(urls, None)
+        while first is not None or not parts:
+            path = output / f"sitemap-{len(parts) + 1}.xml"
+            part = itertools.islice(urls, SITEMAP_MAX_URLS - 1)
+            self.write_file(path, self.sitemap_chunks(first, part))
+            parts.append(path)
+            first = next(urls, None)
+        if len(parts) == 1:
+            os.replace(parts[0], output / "sitemap.xml")
+            written = set()
+        else:
+            written = set(parts)
+            self.write_file(
+                output / "sitemap.xml",
+                [
+                    '<?xml version="1.0" encoding="UTF-8"?>\n',
+                    f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n',
+                    *(
+                        f"<sitemap><loc>{scheme}://{escape(domain)}/{part.name}</loc>"
+                        "</sitemap>\n"
+                        for part in parts
+                    ),
+                    "</sitemapindex>\n",
+                ],
+            )
+        # Remove the parts of a previous, larger archive once the new
+        # sitemap.xml no longer refers to them.
+        for path in output.glob("sitemap-*.xml"):
+            if path not in written:
+                path.unlink()
+        return len(parts)
+
+    def sitemap_chunks(self, first, urls):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield f'<urlset xmlns="{SITEMAP_NAMESPACE}">\n'
+        if first:
+            yield first
+        yield from urls
+        yield "</urlset>\n"
+
+    def handle(self, *args, **options):
+        output = options["output"] or Path(settings.STATIC_FEEDS_ROOT)
+        scheme = settings.STATIC_FEEDS_SCHEME
+        count = self.write_feeds(output, scheme)
+        logger.info(f"Wrote {count} feeds to {output}.")
+        count = self.write_sitemaps(output, Site.objects.get_current().domain, scheme)
+        logger.info(f"Wrote {count} sitemaps to {output}.")
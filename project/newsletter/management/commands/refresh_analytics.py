@@ -0,0 +1,78 @@
+import logging
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from project.newsletter import operations
+from project.newsletter.models import DailyRollup
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the rollups used by the analytics page from history.
+
+    The daily rollups are kept up to date as posts and subscriptions
+    change, so they only need rebuilding after changes that bypass the
+    model signals, such as bulk inserts or queryset updates.
+
+    The notification rollups are refreshed for posts whose notifications
+    were updated since the last refresh, or for all posts with --full. The
+    analytics page also refreshes them when it computes its numbers.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="The first day (YYYY-MM-DD) to recompute. Defaults to the most recent rollup's day.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the rollups for the entire history.",
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=30,
+            help="The number of days to recompute per transaction.",
+        )
+
+    def get_since(self, options) -> date:
+        """
+        Determine the first day to recompute.
+
+        Without options, the most recent day with rollups is recomputed
+        since it may have been incomplete when it was last refreshed.
+        """
+        if options["since"]:
+            return options["since"]
+        if not options["full"]:
+            if latest := DailyRollup.objects.aggregate(latest=Max("day"))["latest"]:
+                return latest
+        return operations.earliest_rollup_day()
+
+    def handle(self, *args, **options):
+        since = self.get_since(options)
+        today = timezone.localdate()
+        chunk = timedelta(days=options["chunk_days"])
+        count = 0
+        start = since
+        while start <= today:
+            end = start + chunk - timedelta(days=1)
+            # The last chunk includes any days in the future.
+            count += operations.refresh_daily_rollups(
+                start, None if end >= today else end
+            )
+            start = end + timedelta(days=1)
+        logger.info(f"Refreshed {count} daily rollups since {since}.")
+
+        if options["full"]:
+            count = operations.refresh_notification_rollups()
+        else:
+            count = operations.refresh_changed_notification_rollups()
+        logger.info(f"Refreshed {count} notification rollups.")
@@ -2,11 +2,13 @@ import logging
 
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.mail import send_mail
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from project.newsletter import syndication
 from project.newsletter.models import Post, Subscription, SubscriptionNotification
 
 logger = logging.getLogger(__name__)
@@ -66,10 +68,24 @@ class Command(BaseCommand):
                 post.notifications_sent = post.updated = timezone.now()
                 post.save(update_fields=["notifications_sent", "updated"])
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--static-feeds",
+            action="store_true",
+            help="Regenerate the static feeds and sitemap when posts are published.",
+        )
+
     def handle(self, *args, **options):
-        Post.objects.needs_publishing().update(
+        published = Post.objects.needs_publishing().update(
             is_published=True, updated=timezone.now()
         )
+        if published:
+            syndication.invalidate()
+        # Posts published since the last run are those still needing
+        # notifications, so check before they're sent.
+        regenerate_static_feeds = options["static_feeds"] and (
+            published or Post.objects.published().needs_notifications_sent().exists()
+        )
         for post, notification in self.iterate_subscription_notifications():
             subject = SUBJECT.format(name=post.author.get_full_name(), title=post.title)
             message = MESSAGE.format(
@@ -81,3 +97,5 @@ class Command(BaseCommand):
                 from_email=None,
                 recipient_list=[notification.email],
             )
+        if regenerate_static_feeds:
+            call_command("generate_static_feeds")
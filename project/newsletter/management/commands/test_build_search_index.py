@@ -0,0 +1,26 @@
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+
+from project.newsletter import search
+from project.newsletter.models import Post
+from project.newsletter.test import DataTestCase
+
+
+class TestBuildSearchIndex(DataTestCase):
+    def test_build(self):
+        Post.objects.filter(id=self.data.all_post.id).update(title="Bypassed")
+        with self.assertLogs(
+            "project.newsletter.management.commands.build_search_index", "INFO"
+        ) as logs:
+            call_command("build_search_index")
+        self.assertIn("Indexed 3 posts.", logs.output[0])
+        self.assertEqual(
+            search.search_posts(Post.objects.all(), "bypassed")[0][1],
+            self.data.all_post.id,
+        )
+
+    def test_unavailable(self):
+        with patch("project.newsletter.search._sqlite_has_fts5", return_value=False):
+            with self.assertRaises(CommandError):
+                call_command("build_search_index")
@@ -0,0 +1,35 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from project.newsletter.models import SubscriptionNotification
+from project.newsletter.test import DataTestCase
+
+
+class TestExportNotifications(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.notification = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=timezone.now(),
+        )
+
+    def test_stdout(self):
+        out = StringIO()
+        call_command("export_notifications", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "id,post_slug,post_title,email,created,sent,read")
+        self.assertEqual(len(lines), 2)
+
+    def test_output_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "notifications.jsonl"
+            call_command("export_notifications", "--format=jsonl", f"--output={path}")
+            row = json.loads(path.read_text())
+        self.assertEqual(row["id"], self.notification.id)
+        self.assertEqual(row["email"], "subscriber@example.com")
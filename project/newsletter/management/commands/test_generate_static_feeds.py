@@ -0,0 +1,100 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+
+from project.newsletter import syndication
+from project.newsletter.models import Post
+from project.newsletter.test import DataTestCase
+
+NAMESPACE = {"sitemap": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+
+
+class TestGenerateStaticFeeds(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            syndication.invalidate()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = Path(directory.name)
+
+    def locations(self, path):
+        return [
+            element.text
+            for element in ElementTree.parse(path).findall(".//sitemap:loc", NAMESPACE)
+        ]
+
+    def test_feeds(self):
+        call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertEqual(
+            (self.output / "rss/index.xml").read_bytes(),
+            self.client.get("/rss/", secure=True).content,
+        )
+        for slug in ["career", "social"]:
+            self.assertEqual(
+                (self.output / f"rss/{slug}/index.xml").read_bytes(),
+                self.client.get(f"/rss/{slug}/", secure=True).content,
+            )
+        self.assertEqual((self.output / "rss/index.xml").stat().st_mode & 0o777, 0o644)
+
+    def test_live_feeds_not_cached(self):
+        call_command("generate_static_feeds", f"--output={self.output}")
+        for secure in [False, True]:
+            # The posts and their through rows, since the body wasn't cached.
+            with self.assertNumQueries(2):
+                self.client.get("/rss/", secure=secure)
+
+    def test_scheme(self):
+        with self.settings(STATIC_FEEDS_SCHEME="http"):
+            call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertIn(
+            "<link>http://example.com/p/</link>",
+            (self.output / "rss/index.xml").read_text(),
+        )
+        self.assertEqual(
+            self.locations(self.output / "sitemap.xml"),
+            ["http://example.com/p/all-post/", "http://example.com/p/career-post/"],
+        )
+
+    def test_sitemap(self):
+        call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertEqual(
+            self.locations(self.output / "sitemap.xml"),
+            [
+                "https://example.com/p/all-post/",
+                "https://example.com/p/career-post/",
+            ],
+        )
+
+    @patch(
+        "project.newsletter.management.commands.generate_static_feeds.SITEMAP_MAX_URLS",
+        1,
+    )
+    def test_sitemap_index(self):
+        call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertEqual(
+            self.locations(self.output / "sitemap.xml"),
+            ["https://example.com/sitemap-1.xml", "https://example.com/sitemap-2.xml"],
+        )
+        self.assertEqual(
+            self.locations(self.output / "sitemap-2.xml"),
+            ["https://example.com/p/career-post/"],
+        )
+
+    def test_stale_sitemap_parts(self):
+        with patch(
+            "project.newsletter.management.commands.generate_static_feeds.SITEMAP_MAX_URLS",
+            1,
+        ):
+            call_command("generate_static_feeds", f"--output={self.output}")
+        call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertEqual(list(self.output.glob("sitemap-*.xml")), [])
+        self.assertEqual(len(self.locations(self.output / "sitemap.xml")), 2)
+
+    def test_empty_sitemap(self):
+        Post.objects.all().delete()
+        call_command("generate_static_feeds", f"--output={self.output}")
+        self.assertEqual(self.locations(self.output / "sitemap.xml"), [])
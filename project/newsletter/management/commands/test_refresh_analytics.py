@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from project.newsletter import analytics, operations
+from project.newsletter.models import (
+    DailyRollup,
+    NotificationRollup,
+    Post,
+    Subscription,
+    SubscriptionNotification,
+)
+from project.newsletter.test import DataTestCase
+
+
+def rollups():
+    return {
+        (rollup.day, rollup.category_id): (rollup.posts, rollup.subscriptions)
+        for rollup in DailyRollup.objects.all()
+    }
+
+
+class TestRefreshAnalytics(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.today = timezone.localdate()
+        self.old_posts = []
+        for days in [3, 10, 45]:
+            post = Post.objects.create(
+                author=self.data.author, title=f"{days}", slug=f"{days}", content="c"
+            )
+            post.categories.set([self.data.career])
+            self.old_posts.append(post)
+        # Updating created bypasses the rollup counters.
+        for post, days in zip(self.old_posts, [3, 10, 45], strict=True):
+            Post.objects.filter(id=post.id).update(
+                created=timezone.now() - timedelta(days=days)
+            )
+
+    def test_full(self):
+        call_command("refresh_analytics", "--full")
+        self.assertEqual(
+            rollups(),
+            {
+                (self.today, None): (3, 1),
+                (self.today, self.data.career.id): (2, 1),
+                (self.today, self.data.social.id): (2, 1),
+                (self.today - timedelta(days=3), None): (1, 0),
+                (self.today - timedelta(days=3), self.data.career.id): (1, 0),
+                (self.today - timedelta(days=10), None): (1, 0),
+                (self.today - timedelta(days=10), self.data.career.id): (1, 0),
+                (self.today - timedelta(days=45), None): (1, 0),
+                (self.today - timedelta(days=45), self.data.career.id): (1, 0),
+            },
+        )
+
+    def test_chunks(self):
+        call_command("refresh_analytics", "--full")
+        expected = rollups()
+        DailyRollup.objects.all().delete()
+        call_command("refresh_analytics", "--full", "--chunk-days", "2")
+        self.assertEqual(rollups(), expected)
+
+    def test_latest_day(self):
+        # Only the most recent day with rollups is recomputed.
+        call_command("refresh_analytics")
+        self.assertEqual(
+            set(rollups()),
+            {
+                (self.today, None),
+                (self.today, self.data.career.id),
+                (self.today, self.data.social.id),
+            },
+        )
+        self.assertEqual(rollups()[self.today, None], (3, 1))
+
+    def test_since(self):
+        since = self.today - timedelta(days=10)
+        call_command("refresh_analytics", "--since", since.isoformat())
+        self.assertEqual(rollups()[since, None], (1, 0))
+        self.assertNotIn((self.today - timedelta(days=45), None), rollups())
+
+
+class TestRefreshNotificationAnalytics(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        sent = timezone.now() - timedelta(days=1)
+        users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+        self.subscriptions = [Subscription.objects.create(user=user) for user in users]
+        for subscription, read in zip(
+            self.subscriptions,
+            [sent + timedelta(seconds=30), sent + timedelta(hours=2), None],
+            strict=True,
+        ):
+            SubscriptionNotification.objects.create(
+                subscription=subscription, post=self.data.all_post, sent=sent, read=read
+            )
+        # Unsent notifications aren't counted.
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription, post=self.data.all_post
+        )
+
+    def test_refresh(self):
+        call_command("refresh_analytics")
+        rollup = NotificationRollup.objects.get()
+        self.assertEqual(rollup.post, self.data.all_post)
+        self.assertEqual(rollup.sent, 3)
+        self.assertEqual(rollup.read, 2)
+        expected = analytics.empty_histogram()
+        expected[0] = expected[5] = 1
+        self.assertEqual(rollup.latency_histogram, expected)
+
+    def test_incremental(self):
+        call_command("refresh_analytics")
+        refreshed = NotificationRollup.objects.get().refreshed
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.career_post,
+            sent=timezone.now(),
+            read=timezone.now(),
+        )
+        call_command("refresh_analytics")
+        rollups = {
+            rollup.post_id: rollup for rollup in NotificationRollup.objects.all()
+        }
+        self.assertEqual(rollups[self.data.career_post.id].read, 1)
+        # Posts without updated notifications aren't recomputed.
+        self.assertEqual(rollups[self.data.all_post.id].refreshed, refreshed)
+
+        call_command("refresh_analytics", "--full")
+        self.assertGreater(
+            NotificationRollup.objects.get(post=self.data.all_post).refreshed, refreshed
+        )
+
+    def test_resent(self):
+        call_command("refresh_analytics")
+        operations.resend_notifications(
+            SubscriptionNotification.objects.filter(post=self.data.all_post)
+        )
+        call_command("refresh_analytics")
+        self.assertFalse(NotificationRollup.objects.exists())
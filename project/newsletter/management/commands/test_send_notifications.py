@@ -79,3 +79,26 @@ class TestSendNotifications(TestCase):
             from_email=None,
             recipient_list=["alex@example.com"],
         )
+
+    @patch("project.newsletter.management.commands.send_notifications.call_command")
+    def test_static_feeds(self, call_command_mock):
+        author = User.objects.create(username="author")
+        Post.objects.create(
+            author=author, title="title", slug="slug", is_published=True, content="c"
+        )
+        call_command("send_notifications")
+        call_command_mock.assert_not_called()
+
+        call_command("send_notifications", "--static-feeds")
+        # Every post has had its notifications sent already.
+        call_command_mock.assert_not_called()
+
+        Post.objects.create(
+            author=author,
+            title="scheduled",
+            slug="scheduled",
+            publish_at=timezone.now(),
+            content="c",
+        )
+        call_command("send_notifications", "--static-feeds")
+        call_command_mock.assert_called_once_with("generate_static_feeds")
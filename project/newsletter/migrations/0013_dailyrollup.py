@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:13
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    # Without the history, refresh_analytics would only recompute the days
+    # after the first rollup written by the receivers. This repeats
+    # operations.refresh_daily_rollups() with the historical models.
+    using = schema_editor.connection.alias
+    Post = apps.get_model("newsletter", "Post")
+    Subscription = apps.get_model("newsletter", "Subscription")
+    DailyRollup = apps.get_model("newsletter", "DailyRollup")
+    counts = defaultdict(lambda: {"posts": 0, "subscriptions": 0})
+    groupings = [
+        ("posts", Post.objects.using(using), "created", None),
+        (
+            "posts",
+            Post.categories.through.objects.using(using),
+            "post__created",
+            "category_id",
+        ),
+        (
+            "subscriptions",
+            Subscription.objects.using(using).filter(categories__isnull=False),
+            "created",
+            None,
+        ),
+        (
+            "subscriptions",
+            Subscription.categories.through.objects.using(using),
+            "subscription__created",
+            "category_id",
+        ),
+    ]
+    for field, queryset, created, category in groupings:
+        rows = (
+            queryset.annotate(day=TruncDate(created))
+            .values("day", *([category] if category else []))
+            .annotate(count=Count("pk", distinct=True))
+            .order_by()
+        )
+        for row in rows:
+            counts[row["day"], row.get(category)][field] = row["count"]
+    DailyRollup.objects.using(using).bulk_create(
+        [
+            DailyRollup(day=day, category_id=category_id, **values)
+            for (day, category_id), values in counts.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("newsletter", "0012_alter_category_created_alter_post_created_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("posts", models.IntegerField(default=0)),
+                ("subscriptions", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="newsletter.category",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "category"), name="daily_rollup_uniq"
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("category__isnull", True)),
+                        fields=("day",),
+                        name="daily_rollup_total_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("newsletter", "0013_dailyrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationRollup",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_rollup",
+                        serialize=False,
+                        to="newsletter.post",
+                    ),
+                ),
+                ("sent", models.IntegerField(default=0)),
+                ("read", models.IntegerField(default=0)),
+                ("latency_histogram", models.JSONField(default=list)),
+                ("refreshed", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        # refresh_notification_rollups finds the changed notifications by
+        # their updated timestamp.
+        migrations.AddIndex(
+            model_name="subscriptionnotification",
+            index=models.Index(fields=["updated"], name="subscript_notif_updated_idx"),
+        ),
+    ]
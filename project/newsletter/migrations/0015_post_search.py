@@ -0,0 +1,49 @@
+import sqlite3
+
+from django.db import migrations
+
+# The index as of this migration. Later changes to project.newsletter.search
+# need their own migration.
+TABLE = "newsletter_post_search"
+COLUMNS = ["title", "slug", "summary", "content"]
+
+
+def is_available(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with sqlite3.connect(":memory:") as memory:
+        options = {row[0] for row in memory.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if is_available(connection):
+        columns = ", ".join(COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                f"{columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f"DELETE FROM {TABLE}")
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM newsletter_post"
+            )
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if is_available(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("newsletter", "0014_notificationrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
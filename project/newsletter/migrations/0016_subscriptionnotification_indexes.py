@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("newsletter", "0015_post_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscriptionnotification",
+            index=models.Index(fields=["sent"], name="subscript_notif_sent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="subscriptionnotification",
+            index=models.Index(fields=["created"], name="subscript_notif_created_idx"),
+        ),
+    ]
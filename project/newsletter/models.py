@@ -253,9 +253,91 @@ class SubscriptionNotification(TimestampedModel):
                 fields=["post", "subscription"], name="subscript_notif_uniq"
             )
         ]
+        indexes = [
+            models.Index(fields=["sent"], name="subscript_notif_sent_idx"),
+            models.Index(fields=["created"], name="subscript_notif_created_idx"),
+            models.Index(fields=["updated"], name="subscript_notif_updated_idx"),
+        ]
 
     def __repr__(self):
         return f"<SubscriptionNotification id={self.id} subscription={self.subscription_id} post={self.post_id} sent={self.sent} created={self.created} updated={self.updated}>"
 
     def __str__(self):
         return f"SubscriptionNotification id={self.id}"
+
+
+class DailyRollupQuerySet(models.QuerySet):
+    def totals(self):
+        """Limit to the rollups across all categories."""
+        return self.filter(category__isnull=True)
+
+    def per_category(self):
+        """Limit to the rollups of individual categories."""
+        return self.filter(category__isnull=False)
+
+
+class DailyRollup(models.Model):
+    """
+    The number of posts and subscriptions created per day.
+
+    Rows with a category count the posts and subscriptions in that
+    category. Rows without a category hold the totals, counting each post
+    once and each subscription with at least one category once.
+    """
+
+    day = models.DateField()
+    category = models.ForeignKey(
+        Category,
+        null=True,
+        blank=True,
+        related_name="daily_rollups",
+        on_delete=models.CASCADE,
+    )
+    posts = models.IntegerField(default=0)
+    subscriptions = models.IntegerField(default=0)
+    objects = models.Manager.from_queryset(DailyRollupQuerySet)()
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "category"], name="daily_rollup_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["day"],
+                condition=models.Q(category__isnull=True),
+                name="daily_rollup_total_uniq",
+            ),
+        ]
+
+    def __repr__(self):
+        return f"<DailyRollup day={self.day} category={self.category_id} posts={self.posts} subscriptions={self.subscriptions}>"
+
+    def __str__(self):
+        return f"DailyRollup day={self.day} category={self.category_id}"
+
+
+class NotificationRollup(models.Model):
+    """
+    The number of notifications sent and read for a post.
+
+    The read latency histogram counts the read notifications in the
+    buckets of project.newsletter.analytics.LATENCY_BUCKETS.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name="notification_rollup",
+        on_delete=models.CASCADE,
+    )
+    sent = models.IntegerField(default=0)
+    read = models.IntegerField(default=0)
+    latency_histogram = models.JSONField(default=list)
+    refreshed = models.DateTimeField(default=timezone.now)
+
+    def __repr__(self):
+        return f"<NotificationRollup post={self.post_id} sent={self.sent} read={self.read} refreshed={self.refreshed}>"
+
+    def __str__(self):
+        return f"NotificationRollup post={self.post_id}"
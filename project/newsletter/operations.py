@@ -2,13 +2,103 @@
 This file contains create/update/writing operations.
 """
 
-from datetime import timedelta
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
 
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case,
+    Count,
+    DateTimeField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from martor.views import User
 
-from project.newsletter.models import Post, SubscriptionNotification
+from project.newsletter import analytics, syndication
+from project.newsletter.chunking import iterate_chunks
+from project.newsletter.models import (
+    DailyRollup,
+    NotificationRollup,
+    Post,
+    Subscription,
+    SubscriptionNotification,
+)
+
+UPDATE_CHUNK_SIZE = 1000
+
+
+def set_published(posts, is_published: bool, chunk_size=UPDATE_CHUNK_SIZE) -> int:
+    """
+    Publish or unpublish the posts with an UPDATE per chunk.
+
+    The cached post details are deleted per chunk and the feeds are
+    invalidated since queryset updates don't trigger the post_save receiver.
+
+    :param posts: The Post queryset.
+    :param is_published: The new value of is_published.
+    :return: The number of posts that were changed.
+    """
+    count = 0
+    posts = posts.exclude(is_published=is_published)
+    for chunk in iterate_chunks(posts, "slug", chunk_size=chunk_size):
+        count += Post.objects.filter(id__in=[row[0] for row in chunk]).update(
+            is_published=is_published, updated=timezone.now()
+        )
+        cache.delete_many([f"post.detail.{slug}" for _, slug in chunk])
+    if count:
+        syndication.invalidate()
+    return count
+
+
+def mark_notifications_read(notifications, chunk_size=UPDATE_CHUNK_SIZE) -> int:
+    """
+    Mark the unread notifications as read with an UPDATE per chunk.
+
+    :param notifications: The SubscriptionNotification queryset.
+    :return: The number of notifications that were changed.
+    """
+    count = 0
+    notifications = notifications.filter(read__isnull=True)
+    for chunk in iterate_chunks(notifications, chunk_size=chunk_size):
+        now = timezone.now()
+        count += SubscriptionNotification.objects.filter(
+            id__in=[row[0] for row in chunk]
+        ).update(read=now, updated=now)
+    return count
+
+
+def resend_notifications(notifications, chunk_size=UPDATE_CHUNK_SIZE) -> int:
+    """
+    Reset the sent notifications so send_notifications sends them again.
+
+    The notifications are marked as unsent and unread and their posts as
+    needing notifications sent.
+
+    :param notifications: The SubscriptionNotification queryset.
+    :return: The number of notifications that were changed.
+    """
+    count = 0
+    notifications = notifications.filter(sent__isnull=False)
+    for chunk in iterate_chunks(notifications, "post_id", chunk_size=chunk_size):
+        now = timezone.now()
+        with transaction.atomic():
+            count += SubscriptionNotification.objects.filter(
+                id__in=[row[0] for row in chunk]
+            ).update(sent=None, read=None, updated=now)
+            Post.objects.filter(id__in={post_id for _, post_id in chunk}).update(
+                notifications_sent=None, updated=now
+            )
+    return count
 
 
 def mark_as_read(post: Post, user: User):
@@ -26,18 +116,205 @@ def mark_as_read(post: Post, user: User):
     ).update(read=timezone.now(), updated=timezone.now())
 
 
-def check_is_trending(post: Post):
+def mark_many_as_read(reads: dict[tuple[int, int], datetime]) -> int:
+    """
+    Mark the posts as read for the users with a single UPDATE.
+
+    :param reads: A mapping of (post id, user id) pairs to when the post was read.
+    :return: The number of notifications that were marked as read.
+    """
+    subscription_ids = dict(
+        Subscription.objects.filter(
+            user_id__in={user_id for _, user_id in reads}
+        ).values_list("user_id", "id")
+    )
+    filters = Q()
+    whens = []
+    for (post_id, user_id), read in reads.items():
+        if subscription_id := subscription_ids.get(user_id):
+            filters |= Q(post_id=post_id, subscription_id=subscription_id)
+            whens.append(
+                When(post_id=post_id, subscription_id=subscription_id, then=Value(read))
+            )
+    if not whens:
+        return 0
+    return SubscriptionNotification.objects.filter(filters, read__isnull=True).update(
+        read=Case(*whens, output_field=DateTimeField()), updated=timezone.now()
+    )
+
+
+def bump_daily_rollups(changes: dict[tuple[date, int | None], dict[str, int]]):
+    """
+    Increment the DailyRollup counters, creating the rows when necessary.
+
+    :param changes: A mapping of (day, category id) pairs to the amounts to
+        add to each counter. A category id of None is the day's totals.
+    :return: None
+    """
+    for (day, category_id), deltas in changes.items():
+        if not (deltas := {field: delta for field, delta in deltas.items() if delta}):
+            continue
+        rollups = DailyRollup.objects.filter(day=day, category_id=category_id)
+        increments = {field: F(field) + delta for field, delta in deltas.items()}
+        if rollups.update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                DailyRollup.objects.create(day=day, category_id=category_id, **deltas)
+        except IntegrityError:
+            # A concurrent bump created the row first.
+            rollups.update(**increments)
+
+
+def earliest_rollup_day() -> date:
+    """The first day to recompute the daily rollups of the entire history."""
+    earliest = [
+        Post.objects.aggregate(earliest=Min("created"))["earliest"],
+        Subscription.objects.aggregate(earliest=Min("created"))["earliest"],
+    ]
+    earliest = [value.date() for value in earliest if value]
+    # Be lenient by a day to include any timezone differences.
+    return min(earliest, default=timezone.localdate()) - timedelta(days=1)
+
+
+def refresh_daily_rollups(since: date, until: date | None = None) -> int:
+    """
+    Recompute the DailyRollup rows for the given days.
+
+    :param since: The first day to recompute.
+    :param until: The last day to recompute. Defaults to all later days.
+    :return: The number of DailyRollup rows created.
+    """
+    tz = timezone.get_current_timezone()
+    created = Q(created__gte=datetime.combine(since, time.min, tzinfo=tz))
+    if until:
+        created &= Q(
+            created__lt=datetime.combine(until + timedelta(days=1), time.min, tzinfo=tz)
+        )
+    counts = defaultdict(lambda: {"posts": 0, "subscriptions": 0})
+    post_categories = Post.categories.through.objects
+    subscription_categories = Subscription.categories.through.objects
+    groupings = [
+        ("posts", Post.objects.filter(created), "created", None),
+        (
+            "posts",
+            post_categories.filter(post__in=Post.objects.filter(created)),
+            "post__created",
+            "category_id",
+        ),
+        (
+            "subscriptions",
+            Subscription.objects.filter(created, categories__isnull=False),
+            "created",
+            None,
+        ),
+        (
+            "subscriptions",
+            subscription_categories.filter(
+                subscription__in=Subscription.objects.filter(created)
+            ),
+            "subscription__created",
+            "category_id",
+        ),
+    ]
+    for field, queryset, created, category in groupings:
+        rows = (
+            queryset.annotate(day=TruncDate(created))
+            .values("day", *([category] if category else []))
+            .annotate(count=Count("pk", distinct=True))
+            .order_by()
+        )
+        for row in rows:
+            counts[row["day"], row.get(category)][field] = row["count"]
+
+    days = Q(day__gte=since) & (Q(day__lte=until) if until else Q())
+    with transaction.atomic():
+        DailyRollup.objects.filter(days).delete()
+        rollups = DailyRollup.objects.bulk_create(
+            [
+                DailyRollup(day=day, category_id=category_id, **values)
+                for (day, category_id), values in counts.items()
+            ],
+            batch_size=500,
+        )
+    return len(rollups)
+
+
+def refresh_notification_rollups(since: datetime | None = None) -> int:
     """
-    Determine if the given post is trending.
+    Recompute the NotificationRollup rows of posts with changed notifications.
+
+    The latencies are bucketed and counted by the database, so each post's
+    histogram comes from a single grouped query rather than its rows.
+
+    :param since: Only recompute posts with notifications updated since then.
+        Defaults to all posts.
+    :return: The number of NotificationRollup rows refreshed.
+    """
+    refreshed = timezone.now()
+    notifications = SubscriptionNotification.objects.filter(sent__isnull=False)
+    # Posts whose notifications are all unsent again have no rollup.
+    stale = NotificationRollup.objects.exclude(
+        post_id__in=notifications.values("post_id")
+    )
+    if since:
+        changed = SubscriptionNotification.objects.filter(updated__gte=since).values(
+            "post_id"
+        )
+        notifications = notifications.filter(post_id__in=changed)
+        stale = stale.filter(post_id__in=changed)
+    stale.delete()
+    rollups = {
+        post_id: NotificationRollup(
+            post_id=post_id,
+            sent=sent,
+            read=read,
+            latency_histogram=analytics.empty_histogram(),
+            refreshed=refreshed,
+        )
+        for post_id, sent, read in notifications.values("post_id")
+        .annotate(sent_count=Count("id"), read_count=Count("read"))
+        .values_list("post_id", "sent_count", "read_count")
+        .order_by()
+    }
+    latency = ExpressionWrapper(F("read") - F("sent"), output_field=DurationField())
+    bucket = Case(
+        *[
+            When(latency__lt=bound, then=Value(index))
+            for index, bound in enumerate(analytics.LATENCY_BUCKETS)
+        ],
+        default=Value(len(analytics.LATENCY_BUCKETS)),
+    )
+    buckets = (
+        notifications.filter(read__isnull=False)
+        .annotate(latency=latency)
+        .annotate(bucket=bucket)
+        .values("post_id", "bucket")
+        .annotate(count=Count("id"))
+        .values_list("post_id", "bucket", "count")
+        .order_by()
+    )
+    for post_id, index, count in buckets:
+        rollups[post_id].latency_histogram[index] = count
+    NotificationRollup.objects.bulk_create(
+        rollups.values(),
+        update_conflicts=True,
+        unique_fields=["post"],
+        update_fields=["sent", "read", "latency_histogram", "refreshed"],
+        batch_size=500,
+    )
+    return len(rollups)
+
+
+def refresh_changed_notification_rollups() -> int:
+    """
+    Refresh the NotificationRollup rows of posts whose notifications were
+    updated since the last refresh.
+
+    The index on SubscriptionNotification.updated keeps this cheap enough
+    to run whenever the analytics are computed.
 
-    :param post: The Post instance.
-    :return: bool
+    :return: The number of NotificationRollup rows refreshed.
     """
-    key = f"post.trending.{post.slug}"
-    now = timezone.now()
-    hour_ago = now - timedelta(hours=1)
-    views = [timestamp for timestamp in cache.get(key, []) if timestamp >= hour_ago]
-    is_trending = len(views) > 5
-    views.append(now)
-    cache.set(key, views, timeout=600)
-    return is_trending
+    latest = NotificationRollup.objects.aggregate(latest=Max("refreshed"))["latest"]
+    return refresh_notification_rollups(latest)
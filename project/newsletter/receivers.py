@@ -1,11 +1,133 @@
+from collections import defaultdict
+
 from django.core.cache import cache
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from project.newsletter.models import Post
+from project.newsletter import operations, registry, search, syndication
+from project.newsletter.models import Category, Post, Subscription
 
 
 @receiver(post_save, sender=Post)
 def on_post_save(instance, raw, created, **kwargs):
     if not raw and not created:
         cache.delete(f"post.detail.{instance.slug}")
+    if not raw and created:
+        operations.bump_daily_rollups(
+            {(timezone.localdate(instance.created), None): {"posts": 1}}
+        )
+
+
+@receiver(post_save, sender=Post)
+def on_post_save_search(instance, using, **kwargs):
+    if search.is_available(using):
+        search.index_posts([instance], using)
+
+
+@receiver(post_delete, sender=Post)
+def on_post_delete_search(instance, using, **kwargs):
+    if search.is_available(using):
+        search.remove_posts([instance.id], using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(m2m_changed, sender=Post.categories.through)
+def on_post_changed_feeds(using, action=None, **kwargs):
+    """Invalidate the cached feeds when a post or its categories change."""
+    if action is None or action.startswith("post_"):
+        syndication.invalidate(using)
+
+
+def _category_rows(model, owner_ids):
+    """The (owner id, category id) through rows of the owners."""
+    owner = f"{model._meta.model_name}_id"
+    return set(
+        model.categories.through.objects.filter(
+            **{f"{owner}__in": owner_ids}
+        ).values_list(owner, "category_id")
+    )
+
+
+def _rollup_changes(model, owner_ids, before, after):
+    """
+    Determine the DailyRollup counter changes from the through rows.
+
+    Each added or removed category counts towards the category on the day
+    the owner was created. Subscriptions also count towards the day's
+    total when they gain their first category or lose their last one.
+    """
+    field = "subscriptions" if model is Subscription else "posts"
+    days = {
+        owner_id: timezone.localdate(created)
+        for owner_id, created in model.objects.filter(id__in=owner_ids).values_list(
+            "id", "created"
+        )
+    }
+    changes = defaultdict(lambda: defaultdict(int))
+    for delta, rows in [(1, after - before), (-1, before - after)]:
+        for owner_id, category_id in rows:
+            if owner_id in days:
+                changes[days[owner_id], category_id][field] += delta
+    if model is Subscription:
+        had_categories = {owner_id for owner_id, _ in before}
+        has_categories = {owner_id for owner_id, _ in after}
+        for delta, owners in [
+            (1, has_categories - had_categories),
+            (-1, had_categories - has_categories),
+        ]:
+            for owner_id in owners & days.keys():
+                changes[days[owner_id], None][field] += delta
+    return changes
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Subscription.categories.through)
+def on_categories_changed(instance, action, reverse, model, pk_set, **kwargs):
+    """Keep the DailyRollup counters in sync with category changes."""
+    if action.startswith("pre_"):
+        if reverse:
+            # The instance is a Category and the owners are in pk_set,
+            # unless they are all being cleared.
+            owner_model = model
+            if pk_set is None:
+                pk_set = owner_model.objects.filter(categories=instance).values_list(
+                    "id", flat=True
+                )
+            owner_ids = set(pk_set)
+        else:
+            owner_model = type(instance)
+            owner_ids = {instance.pk}
+        instance._rollup_snapshot = (
+            owner_model,
+            owner_ids,
+            _category_rows(owner_model, owner_ids),
+        )
+    elif snapshot := getattr(instance, "_rollup_snapshot", None):
+        del instance._rollup_snapshot
+        owner_model, owner_ids, before = snapshot
+        after = _category_rows(owner_model, owner_ids)
+        if before != after:
+            operations.bump_daily_rollups(
+                _rollup_changes(owner_model, owner_ids, before, after)
+            )
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=Subscription)
+def on_delete_rollups(sender, instance, **kwargs):
+    """Remove the deleted post or subscription from the DailyRollup counters."""
+    before = _category_rows(sender, {instance.pk})
+    changes = _rollup_changes(sender, {instance.pk}, before, set())
+    if sender is Post:
+        changes[timezone.localdate(instance.created), None]["posts"] -= 1
+    operations.bump_daily_rollups(changes)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def on_category_changed(using, **kwargs):
+    """Reload the category registry and the feeds that show category titles."""
+    registry.invalidate(using)
+    syndication.invalidate(using)
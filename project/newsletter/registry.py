@@ -0,0 +1,95 @@
+"""
+This file contains the in-process registry of the categories.
+
+Categories are looked up by slug on hot paths such as the feeds and the
+subscription form, and they rarely change. They're loaded once per
+process and only reloaded when the version bumped by the Category
+receivers changes. The version is bumped once the saving transaction
+commits, otherwise another process could reload the old categories under
+the new version, or a rolled back save could leave its categories behind.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from project.newsletter import caching
+from project.newsletter.models import Category
+
+VERSION_KEY = "category.registry.version"
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    id: int
+    slug: str
+    title: str
+
+
+@dataclass(frozen=True)
+class Registry:
+    version: int
+    by_slug: dict[str, CategoryEntry]
+    by_id: dict[int, CategoryEntry]
+
+
+_registry: Registry | None = None
+
+
+def _get_registry() -> Registry:
+    global _registry
+    version = caching.get_version(VERSION_KEY)
+    # Replace the registry as a whole so other threads never see it half built.
+    if _registry is None or _registry.version != version:
+        entries = [
+            CategoryEntry(id=id, slug=slug, title=title)
+            for id, slug, title in Category.objects.order_by("title").values_list(
+                "id", "slug", "title"
+            )
+        ]
+        _registry = Registry(
+            version=version,
+            by_slug={entry.slug: entry for entry in entries},
+            by_id={entry.id: entry for entry in entries},
+        )
+    return _registry
+
+
+def by_slug() -> dict[str, CategoryEntry]:
+    """The categories by slug, ordered by title."""
+    return _get_registry().by_slug
+
+
+def by_id() -> dict[int, CategoryEntry]:
+    """The categories by id, ordered by title."""
+    return _get_registry().by_id
+
+
+def get_category(slug: str) -> CategoryEntry:
+    """
+    Look up the category by its slug.
+
+    :param slug: The category's slug.
+    :return: The CategoryEntry.
+    :raises Category.DoesNotExist: If there's no category with the slug.
+    """
+    try:
+        return by_slug()[slug]
+    except KeyError:
+        raise Category.DoesNotExist(f"No category with the slug {slug!r}.") from None
+
+
+def choices() -> list[tuple[str, str]]:
+    """The (slug, title) choices of the categories."""
+    return [(entry.slug, entry.title) for entry in by_slug().values()]
+
+
+def invalidate(using: str = DEFAULT_DB_ALIAS):
+    """
+    Reload the registry in every process on its next use.
+
+    :param using: The database alias of the transaction to wait for.
+    :return: None
+    """
+    transaction.on_commit(partial(caching.bump_version, VERSION_KEY), using=using)
@@ -0,0 +1,179 @@
+"""
+This file contains the full-text search index of the posts.
+
+The index is an SQLite FTS5 table whose rowid is the post's id. When the
+database isn't SQLite or SQLite was built without FTS5 there is no index,
+is_available() returns False and callers should fall back to filtering
+the Post table directly.
+"""
+
+import functools
+import re
+import sqlite3
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from project.newsletter.models import Post
+
+TABLE = "newsletter_post_search"
+COLUMNS = ["title", "slug", "summary", "content"]
+# The columns searched by readers. The slug is only searched in the admin.
+PUBLIC_COLUMNS = ["title", "summary", "content"]
+# The BM25 weight of each column in COLUMNS order.
+RANK_WEIGHTS = [10.0, 0.0, 5.0, 1.0]
+
+
+@functools.cache
+def _sqlite_has_fts5() -> bool:
+    with sqlite3.connect(":memory:") as connection:
+        options = {row[0] for row in connection.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def is_available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Whether the database supports the search index."""
+    return connections[using].vendor == "sqlite" and _sqlite_has_fts5()
+
+
+def create_index(using: str = DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"{', '.join(COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(using: str = DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def rebuild(using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Replace the contents of the index with every post.
+
+    :return: The number of indexed posts.
+    """
+    columns = ", ".join(COLUMNS)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {Post._meta.db_table}"
+        )
+        return cursor.rowcount
+
+
+def index_posts(posts, using: str = DEFAULT_DB_ALIAS):
+    """
+    Add or replace the posts in the index.
+
+    :param posts: An iterable of Post instances.
+    """
+    rows = [(post.id, *(getattr(post, column) for column in COLUMNS)) for post in posts]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s", [row[:1] for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(COLUMNS))})",
+            rows,
+        )
+
+
+def remove_posts(post_ids, using: str = DEFAULT_DB_ALIAS):
+    """
+    Remove the posts from the index.
+
+    :param post_ids: An iterable of Post ids.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s", [(id,) for id in post_ids]
+        )
+
+
+def match_query(text: str, columns: list[str] | None = None) -> str | None:
+    """
+    Convert the user's search text into an FTS5 MATCH query.
+
+    Every word must match and the last word matches as a prefix so that
+    partially typed words find results. Words are quoted so that FTS5
+    operators and punctuation in the text are treated as plain text.
+
+    :param text: The search text.
+    :param columns: The columns to limit the search to. Defaults to all.
+    :return: The MATCH query or None if the text contains no words.
+    """
+    if not (words := re.findall(r"\w+", text)):
+        return None
+    query = " ".join(f'"{word}"' for word in words) + "*"
+    if columns:
+        query = f"{{{' '.join(columns)}}} : ({query})"
+    return query
+
+
+def matching_ids(query: str) -> RawSQL:
+    """
+    A subquery of the ids of the posts matching the query.
+
+    :param query: A MATCH query from match_query.
+    :return: An expression to filter Post ids with.
+    """
+    return RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [query])
+
+
+def search_posts(
+    queryset, text: str, after: tuple[float, int] | None = None, limit: int = 20
+) -> list[tuple[float, int]]:
+    """
+    Find the posts of the queryset matching the text, best match first.
+
+    Matches are ranked with BM25, which is negative with the best match
+    lowest, and ties are broken by id so that (rank, id) can be used as a
+    cursor. Without the index, posts whose title or summary contain every
+    word are returned by id with a rank of 0.
+
+    :param queryset: The Post queryset to limit the results to.
+    :param text: The search text.
+    :param after: The (rank, id) of the last result of the previous page.
+    :param limit: The maximum number of results.
+    :return: A list of (rank, Post id) tuples.
+    """
+    if not is_available(queryset.db):
+        return _search_posts_fallback(queryset, text, after, limit)
+    if not (query := match_query(text, PUBLIC_COLUMNS)):
+        return []
+    ids_sql, ids_params = queryset.order_by().values("id").query.sql_with_params()
+    rank = f"bm25({TABLE}, {', '.join(map(str, RANK_WEIGHTS))})"
+    sql = (
+        f"SELECT {rank} AS score, rowid FROM {TABLE} "
+        f"WHERE {TABLE} MATCH %s AND rowid IN ({ids_sql})"
+    )
+    params = [query, *ids_params]
+    if after:
+        sql += f" AND ({rank} > %s OR ({rank} = %s AND rowid > %s))"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY score, rowid LIMIT %s"
+    params.append(limit)
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(score, post_id) for score, post_id in cursor.fetchall()]
+
+
+def _search_posts_fallback(queryset, text, after, limit):
+    if not (words := re.findall(r"\w+", text)):
+        return []
+    for word in words:
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(summary__icontains=word)
+        )
+    if after:
+        queryset = queryset.filter(id__gt=after[1])
+    return [
+        (0.0, post_id)
+        for post_id in queryset.order_by("id").values_list("id", flat=True)[:limit]
+    ]
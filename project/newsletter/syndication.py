@@ -1,26 +1,173 @@
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import partial
+
 from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date, quote_etag
+from martor.utils import markdownify
+
+from project.newsletter import caching, registry
+from project.newsletter.models import Post
+
+FEED_TIMEOUT = 60 * 60
+FEED_VERSION_KEY = "feed.version"
+FEED_LIMIT = 30
+FEED_MAX_LIMIT = 100
+# The post field rendered into each item's description per ?mode=.
+FEED_MODES = {"": None, "summary": "summary", "full": "content"}
+RENDERED_TIMEOUT = 60 * 60 * 24
+
+
+def invalidate(using: str = DEFAULT_DB_ALIAS):
+    """
+    Invalidate the cached bodies of every feed once the transaction commits.
+
+    Bumping the version before the commit would let a poll in between cache
+    the old body under the new version.
+
+    :param using: The database alias of the transaction to wait for.
+    :return: None
+    """
+    transaction.on_commit(partial(caching.bump_version, FEED_VERSION_KEY), using=using)
+
+
+@dataclass(frozen=True)
+class FeedOptions:
+    """The options of a feed request, returned by get_object()."""
+
+    mode: str = ""
+    limit: int = FEED_LIMIT
+    category: registry.CategoryEntry | None = None
+
+    @classmethod
+    def from_request(cls, request, category=None):
+        """
+        Parse the ?mode= and ?limit= options, ignoring invalid values.
+
+        The limit is capped at FEED_MAX_LIMIT.
+        """
+        mode = request.GET.get("mode", "")
+        if mode not in FEED_MODES:
+            mode = ""
+        try:
+            limit = min(max(int(request.GET["limit"]), 1), FEED_MAX_LIMIT)
+        except (KeyError, ValueError):
+            limit = FEED_LIMIT
+        return cls(mode=mode, limit=limit, category=category)
+
+
+def render_markdown(posts, field: str) -> dict[int, str]:
+    """
+    Render the posts' markdown field to HTML, reusing cached renderings.
 
-from project.newsletter.models import Category, Post
+    Renderings are keyed by the post's updated timestamp, so saving a post
+    renders it again while unchanged posts are served from the cache.
+
+    :param posts: The Post instances.
+    :param field: The name of the MartorField to render.
+    :return: A mapping of post ids to rendered HTML.
+    """
+    keys = {
+        post.id: f"post.rendered.{field}.{post.id}.{post.updated.timestamp()}"
+        for post in posts
+    }
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    missing = {}
+    for post in posts:
+        if (html := cached.get(keys[post.id])) is None:
+            html = missing[keys[post.id]] = markdownify(getattr(post, field))
+        rendered[post.id] = html
+    cache.set_many(missing, RENDERED_TIMEOUT)
+    return rendered
 
 
 class RecentPostsFeed(Feed):
     title = "Newsletter posts"
     description = "Categorized newsletter posts from Tim."
 
-    def items(self):
+    def link(self):
+        return reverse("newsletter:list_posts")
+
+    def get_object(self, request):
+        return FeedOptions.from_request(request)
+
+    def cache_key(self, request):
+        # Key on the parsed options so invalid values share an entry, and on
+        # the scheme since the body's links are absolute.
+        options = FeedOptions.from_request(request)
+        version = caching.get_version(FEED_VERSION_KEY)
         return (
-            Post.objects.recent_first()
-            .published()
-            .public()
-            .prefetch_related("categories")[:30]
+            f"feed.{version}.{request.scheme}.{request.path}"
+            f".{options.mode}.{options.limit}"
+        )
+
+    def __call__(self, request, *args, **kwargs):
+        """
+        Serve the feed from the cache and respond 304 to unchanged polls.
+
+        The body is cached until a post changes, so the queryset and XML
+        generator only run for the first poll after invalidate().
+        """
+        key = self.cache_key(request)
+        if (entry := cache.get(key)) is None:
+            response = super().__call__(request, *args, **kwargs)
+            entry = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": quote_etag(
+                    hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+                ),
+                # Feed sets Last-Modified from the newest item_pubdate.
+                "last_modified": parse_http_date(response["Last-Modified"]),
+            }
+            cache.set(key, entry, FEED_TIMEOUT)
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response.headers["ETag"] = entry["etag"]
+        response.headers["Last-Modified"] = http_date(entry["last_modified"])
+        return get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=entry["last_modified"],
+            response=response,
         )
 
+    def prepare_items(self, posts, options: FeedOptions):
+        """
+        Fetch the posts with their category ids and descriptions.
+
+        The category ids come from the through table and their titles from
+        the category registry, so the categories don't need to be joined
+        or prefetched.
+        """
+        posts = list(posts[: options.limit])
+        if field := FEED_MODES[options.mode]:
+            descriptions = render_markdown(posts, field)
+            for post in posts:
+                post.description = descriptions[post.id]
+        category_ids = defaultdict(list)
+        for post_id, category_id in Post.categories.through.objects.filter(
+            post_id__in=[post.id for post in posts]
+        ).values_list("post_id", "category_id"):
+            category_ids[post_id].append(category_id)
+        for post in posts:
+            post.category_ids = category_ids[post.id]
+        return posts
+
+    def items(self, obj):
+        return self.prepare_items(Post.objects.recent_first().published().public(), obj)
+
     def item_title(self, item):
         return item.title
 
     def item_description(self, item):
-        return ""
+        return getattr(item, "description", "")
 
     def item_pubdate(self, item):
         """
@@ -34,14 +181,17 @@ class RecentPostsFeed(Feed):
         Takes an item, as returned by items(), and returns the item's
         categories.
         """
-        return [category.title for category in item.categories.all()]
+        if (category_ids := getattr(item, "category_ids", None)) is None:
+            category_ids = item.categories.values_list("id", flat=True)
+        categories = registry.by_id()
+        return sorted(categories[id].title for id in category_ids if id in categories)
 
 
 class RecentCategorizedPostsFeed(RecentPostsFeed):
     description = "Categorized newsletter posts from Tim."
 
     def get_object(self, request, slug):
-        return Category.objects.get(slug=slug)
+        return FeedOptions.from_request(request, category=registry.get_category(slug))
 
     def item_title(self, obj):
         return f"{obj.title} newsletter posts"
@@ -50,10 +200,10 @@ class RecentCategorizedPostsFeed(RecentPostsFeed):
         return reverse("newsletter:list_posts") + f"?category={obj.slug}"
 
     def items(self, obj):
-        return (
-            Post.objects.in_category(obj)
+        return self.prepare_items(
+            Post.objects.filter(categories=obj.category.id)
             .recent_first()
             .published()
-            .public()
-            .prefetch_related("categories")[:30]
+            .public(),
+            obj,
         )
@@ -3,7 +3,9 @@ from datetime import timedelta
 from django.core.paginator import Paginator
 from django.template import Library
 from django.utils import timezone
+from django.utils.timesince import timesince
 
+from project.newsletter.analytics import LATENCY_BUCKETS
 from project.newsletter.models import Post
 
 register = Library()
@@ -17,6 +19,18 @@ def is_ellipsis(value):
     return value == Paginator.ELLIPSIS
 
 
+@register.filter
+def latency(value):
+    """
+    Format a read latency bucket bound, such as "< 5 minutes".
+    """
+    if value is None:
+        return "-"
+    now = timezone.now()
+    duration = timesince(now - value, now, depth=1)
+    return f"> {duration}" if value >= LATENCY_BUCKETS[-1] else f"< {duration}"
+
+
 @register.inclusion_tag("inclusion_tags/nice_datetime.html")
 def nice_datetime(post: Post, is_unread: bool):
     """
@@ -1,12 +1,24 @@
+from unittest.mock import patch
+
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from martor.tests.models import Post
 
 from project.newsletter.admin import (
+    EstimatedCountPaginator,
     PostAdmin,
     SubscriptionAdmin,
     SubscriptionNotificationAdmin,
 )
-from project.newsletter.models import Subscription, SubscriptionNotification
+from project.newsletter.models import (
+    Post as NewsletterPost,
+    Subscription,
+    SubscriptionNotification,
+)
 from project.newsletter.test import DataTestCase
 
 
@@ -27,6 +39,39 @@ class TestPostAdmin(DataTestCase):
             {"author": self.user},
         )
 
+    def test_get_search_results(self):
+        model_admin = PostAdmin(NewsletterPost, admin.site)
+        request = self.rf.get("/")
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            request, NewsletterPost.objects.all(), "career po"
+        )
+        self.assertEqual(list(queryset), [self.data.career_post])
+        self.assertFalse(may_have_duplicates)
+
+    def test_get_search_results_fallback(self):
+        model_admin = PostAdmin(NewsletterPost, admin.site)
+        request = self.rf.get("/")
+        with patch("project.newsletter.search.is_available", return_value=False):
+            queryset, _ = model_admin.get_search_results(
+                request, NewsletterPost.objects.all(), "career po"
+            )
+        self.assertEqual(list(queryset), [self.data.career_post])
+
+    def test_changelist_num_queries(self):
+        self.client.force_login(self.user)
+        url = reverse("admin:newsletter_post_changelist")
+        with CaptureQueriesContext(connection) as initial:
+            self.client.get(url)
+        for i in range(10):
+            post = NewsletterPost.objects.create(
+                author=self.data.author, title=f"{i}", slug=f"{i}", content="c"
+            )
+            post.categories.set([self.data.career, self.data.social])
+        with CaptureQueriesContext(connection) as more:
+            response = self.client.get(url)
+        self.assertContains(response, "Career, Social", count=11)
+        self.assertEqual(len(more), len(initial))
+
 
 class TestSubscriptionAdmin(DataTestCase):
     def test_categories_list(self):
@@ -42,6 +87,20 @@ class TestSubscriptionAdmin(DataTestCase):
             "subscriber@example.com",
         )
 
+    def test_changelist_num_queries(self):
+        self.client.force_login(self.user)
+        url = reverse("admin:newsletter_subscription_changelist")
+        with CaptureQueriesContext(connection) as initial:
+            self.client.get(url)
+        for i in range(10):
+            user = User.objects.create_user(username=f"user{i}")
+            subscription = Subscription.objects.create(user=user)
+            subscription.categories.set([self.data.career, self.data.social])
+        with CaptureQueriesContext(connection) as more:
+            response = self.client.get(url)
+        self.assertContains(response, "Career, Social", count=11)
+        self.assertEqual(len(more), len(initial))
+
 
 class TestSubscriptionNotificationAdmin(DataTestCase):
     def test_user_email(self):
@@ -56,3 +115,115 @@ class TestSubscriptionNotificationAdmin(DataTestCase):
             model_admin.user_email(notification),
             "subscriber@example.com",
         )
+
+    def create_notifications(self):
+        notifications = []
+        for i in range(3):
+            post = NewsletterPost.objects.create(
+                author=self.data.author, title=f"{i}", slug=f"{i}", content="c"
+            )
+            notifications.append(
+                SubscriptionNotification.objects.create(
+                    post=post, subscription=self.data.subscription
+                )
+            )
+        return notifications
+
+    @patch.object(SubscriptionNotificationAdmin, "list_per_page", 2)
+    def test_seek_pagination(self):
+        notifications = self.create_notifications()
+        self.client.force_login(self.user)
+        url = reverse("admin:newsletter_subscriptionnotification_changelist")
+        response = self.client.get(url)
+        cl = response.context["cl"]
+        self.assertEqual(cl.result_list, notifications[:0:-1])
+        self.assertEqual(cl.seek_query_string, f"?id__lt={notifications[1].id}")
+        self.assertIsNone(cl.seek_newest_query_string)
+        self.assertContains(response, "Older")
+
+        response = self.client.get(url + cl.seek_query_string)
+        cl = response.context["cl"]
+        self.assertEqual(cl.result_list, notifications[:1])
+        self.assertIsNone(cl.seek_query_string)
+        self.assertEqual(cl.seek_newest_query_string, "?")
+
+    def test_changelist_filters(self):
+        notifications = self.create_notifications()
+        SubscriptionNotification.objects.filter(id=notifications[0].id).update(
+            sent=timezone.now()
+        )
+        self.client.force_login(self.user)
+        url = reverse("admin:newsletter_subscriptionnotification_changelist")
+        response = self.client.get(url, {"sent__isnull": "True"})
+        self.assertEqual(response.context["cl"].result_list, notifications[:0:-1])
+
+
+class TestEstimatedCountPaginator(DataTestCase):
+    def test_count(self):
+        posts = NewsletterPost.objects.order_by("id")
+        self.assertEqual(EstimatedCountPaginator(posts, 1).count, 3)
+
+    @patch.object(EstimatedCountPaginator, "count_limit", 1)
+    def test_estimate(self):
+        self.data.career_post.delete()
+        posts = NewsletterPost.objects.order_by("id")
+        self.assertEqual(
+            EstimatedCountPaginator(posts, 1).count, self.data.private_post.id
+        )
+
+    @patch.object(EstimatedCountPaginator, "count_limit", 1)
+    def test_filtered_capped(self):
+        posts = NewsletterPost.objects.filter(is_public=True).order_by("id")
+        paginator = EstimatedCountPaginator(posts, 1)
+        self.assertEqual(paginator.count, 1)
+        self.assertTrue(paginator.capped)
+
+    @patch.object(EstimatedCountPaginator, "count_limit", 1)
+    def test_changelist_capped(self):
+        for post in [self.data.all_post, self.data.career_post]:
+            SubscriptionNotification.objects.create(
+                subscription=self.data.subscription, post=post, sent=timezone.now()
+            )
+        self.client.force_login(self.user)
+        url = reverse("admin:newsletter_subscriptionnotification_changelist")
+        response = self.client.get(url, {"sent__isnull": "False"})
+        self.assertContains(response, "1+ subscription notifications")
+        # Unfiltered lists are estimated instead.
+        response = self.client.get(url)
+        self.assertFalse(response.context["cl"].paginator.capped)
+
+
+class TestAdminActions(DataTestCase):
+    def test_unpublish(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:newsletter_post_changelist"),
+            {
+                "action": "unpublish",
+                admin.helpers.ACTION_CHECKBOX_NAME: [self.data.all_post.id],
+            },
+            follow=True,
+        )
+        self.assertContains(response, "Unpublished 1 posts.")
+        self.assertEqual(
+            list(NewsletterPost.objects.unpublished()), [self.data.all_post]
+        )
+
+    def test_resend(self):
+        notification = SubscriptionNotification.objects.create(
+            post=self.data.all_post,
+            subscription=self.data.subscription,
+            sent=timezone.now(),
+        )
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:newsletter_subscriptionnotification_changelist"),
+            {
+                "action": "resend",
+                admin.helpers.ACTION_CHECKBOX_NAME: [notification.id],
+            },
+            follow=True,
+        )
+        self.assertContains(response, "Queued 1 notifications to be sent again.")
+        notification.refresh_from_db()
+        self.assertIsNone(notification.sent)
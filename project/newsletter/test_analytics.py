@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+
+from project.newsletter import analytics
+
+
+class TestAnalytics(SimpleTestCase):
+    def test_merge_histograms(self):
+        first = analytics.empty_histogram()
+        first[0] = 1
+        second = analytics.empty_histogram()
+        second[0], second[-1] = 2, 3
+        merged = analytics.merge_histograms([first, second])
+        self.assertEqual(merged[0], 3)
+        self.assertEqual(merged[-1], 3)
+        self.assertEqual(sum(merged), 6)
+
+    def test_percentile(self):
+        histogram = analytics.empty_histogram()
+        self.assertIsNone(analytics.percentile(histogram, 50))
+        # 50 under a minute, 40 under 5 minutes and 10 over 30 days.
+        histogram[0], histogram[1], histogram[-1] = 50, 40, 10
+        self.assertEqual(analytics.percentile(histogram, 50), timedelta(minutes=1))
+        self.assertEqual(analytics.percentile(histogram, 90), timedelta(minutes=5))
+        self.assertEqual(analytics.percentile(histogram, 99), timedelta(days=30))
+
+    def test_summarize(self):
+        histogram = analytics.empty_histogram()
+        histogram[4] = 1
+        self.assertEqual(
+            analytics.summarize(3, 1, histogram),
+            {
+                "sent": 3,
+                "read": 1,
+                "open_rate": 33.3,
+                "p50": timedelta(hours=1),
+                "p90": timedelta(hours=1),
+                "p99": timedelta(hours=1),
+            },
+        )
+        self.assertEqual(
+            analytics.summarize(0, 0, analytics.empty_histogram())["open_rate"], 0
+        )
@@ -0,0 +1,138 @@
+import time
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from project.newsletter import caching
+
+
+class TestGetOrRebuild(SimpleTestCase):
+    key = "test.caching"
+
+    def setUp(self) -> None:
+        cache.delete_many([self.key, caching.lock_key(self.key)])
+
+    def tearDown(self) -> None:
+        cache.delete_many([self.key, caching.lock_key(self.key)])
+
+    def test_rebuilds_on_miss(self):
+        rebuild = Mock(return_value="fresh")
+        self.assertEqual(caching.get_or_rebuild(self.key, rebuild, timeout=60), "fresh")
+        self.assertEqual(caching.get_or_rebuild(self.key, rebuild, timeout=60), "fresh")
+        rebuild.assert_called_once_with()
+        self.assertIsNone(cache.get(caching.lock_key(self.key)))
+
+    def test_releases_lock_on_error(self):
+        rebuild = Mock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            caching.get_or_rebuild(self.key, rebuild, timeout=60)
+        self.assertIsNone(cache.get(caching.lock_key(self.key)))
+
+    def test_serves_stale_while_locked(self):
+        caching.set_value(self.key, "stale", timeout=-1)
+        cache.add(caching.lock_key(self.key), True)
+        rebuild = Mock(return_value="fresh")
+        self.assertEqual(caching.get_or_rebuild(self.key, rebuild, timeout=60), "stale")
+        rebuild.assert_not_called()
+
+    def test_refreshes_expired_value(self):
+        caching.set_value(self.key, "stale", timeout=-1)
+        rebuild = Mock(return_value="fresh")
+        self.assertEqual(caching.get_or_rebuild(self.key, rebuild, timeout=60), "fresh")
+        rebuild.assert_called_once_with()
+
+    @patch("project.newsletter.caching.WAIT_INTERVAL", 0)
+    def test_waits_for_rebuild_without_stale_value(self):
+        cache.add(caching.lock_key(self.key), True)
+        rebuild = Mock(return_value="fresh")
+
+        def rebuilt_elsewhere(seconds):
+            caching.set_value(self.key, "rebuilt", timeout=60)
+
+        with patch("project.newsletter.caching.time.sleep", rebuilt_elsewhere):
+            self.assertEqual(
+                caching.get_or_rebuild(self.key, rebuild, timeout=60), "rebuilt"
+            )
+        rebuild.assert_not_called()
+
+    @patch("project.newsletter.caching.WAIT_TIMEOUT", 0)
+    def test_rebuilds_when_wait_times_out(self):
+        cache.add(caching.lock_key(self.key), True)
+        rebuild = Mock(return_value="fresh")
+        self.assertEqual(caching.get_or_rebuild(self.key, rebuild, timeout=60), "fresh")
+        rebuild.assert_called_once_with()
+
+    def test_background_refresh(self):
+        caching.set_value(self.key, "stale", timeout=-1)
+        rebuild = Mock(return_value="fresh")
+        with patch("project.newsletter.caching.run_in_background") as background:
+            self.assertEqual(
+                caching.get_or_rebuild(self.key, rebuild, timeout=60, background=True),
+                "stale",
+            )
+        rebuild.assert_not_called()
+        func, *args = background.call_args.args
+        self.assertEqual(func(*args), "fresh")
+        self.assertEqual(cache.get(self.key).value, "fresh")
+        self.assertIsNone(cache.get(caching.lock_key(self.key)))
+
+    def test_background_without_stale_value(self):
+        rebuild = Mock(return_value="fresh")
+        with patch("project.newsletter.caching.run_in_background") as background:
+            self.assertEqual(
+                caching.get_or_rebuild(self.key, rebuild, timeout=60, background=True),
+                "fresh",
+            )
+        background.assert_not_called()
+
+
+class TestRunInBackground(SimpleTestCase):
+    def test_run_in_background(self):
+        func = Mock()
+        caching.run_in_background(func, 1).join(timeout=5)
+        func.assert_called_once_with(1)
+
+    def test_logs_errors(self):
+        with self.assertLogs("project.newsletter.caching", "ERROR"):
+            caching.run_in_background(Mock(side_effect=ValueError)).join(timeout=5)
+
+
+class TestShouldRefresh(SimpleTestCase):
+    def test_fresh(self):
+        entry = caching.CachedValue(value=1, expires=time.time() + 60, delta=0.1)
+        self.assertFalse(caching.should_refresh(entry, time.time()))
+
+    def test_expired(self):
+        entry = caching.CachedValue(value=1, expires=time.time() - 1, delta=0.1)
+        self.assertTrue(caching.should_refresh(entry, time.time()))
+
+    def test_early_refresh(self):
+        now = time.time()
+        entry = caching.CachedValue(value=1, expires=now + 1, delta=1)
+        # A random value close to 1 results in a large early refresh window.
+        with patch("project.newsletter.caching.random.random", return_value=0.99):
+            self.assertTrue(caching.should_refresh(entry, now))
+        with patch("project.newsletter.caching.random.random", return_value=0.0):
+            self.assertFalse(caching.should_refresh(entry, now))
+
+
+class TestVersion(SimpleTestCase):
+    key = "test.caching.version"
+
+    def setUp(self) -> None:
+        cache.delete(self.key)
+        self.addCleanup(cache.delete, self.key)
+
+    def test_get_version(self):
+        version = caching.get_version(self.key)
+        self.assertEqual(caching.get_version(self.key), version)
+
+    def test_bump_version(self):
+        version = caching.get_version(self.key)
+        caching.bump_version(self.key)
+        self.assertEqual(caching.get_version(self.key), version + 1)
+
+    def test_bump_missing_version(self):
+        caching.bump_version(self.key)
+        self.assertIsNotNone(cache.get(self.key))
@@ -0,0 +1,24 @@
+from project.newsletter.chunking import iterate_chunks
+from project.newsletter.models import Post
+from project.newsletter.test import DataTestCase
+
+
+class TestIterateChunks(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.posts = list(Post.objects.order_by("id").values_list("id", "slug"))
+
+    def test_iterate_chunks(self):
+        # The full chunk and the short last chunk.
+        with self.assertNumQueries(2):
+            chunks = list(iterate_chunks(Post.objects.all(), "slug", chunk_size=2))
+        self.assertEqual(chunks, [self.posts[:2], self.posts[2:]])
+
+    def test_full_last_chunk(self):
+        # The full last chunk and the empty chunk after it.
+        with self.assertNumQueries(2):
+            chunks = list(iterate_chunks(Post.objects.all(), chunk_size=3))
+        self.assertEqual(chunks, [[(id,) for id, _ in self.posts]])
+
+    def test_empty(self):
+        self.assertEqual(list(iterate_chunks(Post.objects.none())), [])
@@ -0,0 +1,69 @@
+import json
+
+from django.utils import timezone
+
+from project.newsletter import exports
+from project.newsletter.models import SubscriptionNotification
+from project.newsletter.test import DataTestCase
+
+
+class TestIterateNotifications(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.read = timezone.now()
+        self.notifications = [
+            SubscriptionNotification.objects.create(
+                subscription=self.data.subscription,
+                post=post,
+                sent=self.read,
+                read=self.read if post == self.data.all_post else None,
+            )
+            for post in [
+                self.data.all_post,
+                self.data.career_post,
+                self.data.private_post,
+            ]
+        ]
+
+    def test_rows(self):
+        rows = list(exports.iterate_notifications())
+        self.assertEqual(
+            rows[0],
+            (
+                self.notifications[0].id,
+                self.data.all_post.slug,
+                self.data.all_post.title,
+                "subscriber@example.com",
+                self.notifications[0].created.isoformat(),
+                self.read.isoformat(),
+                self.read.isoformat(),
+            ),
+        )
+        self.assertEqual([row[0] for row in rows], [n.id for n in self.notifications])
+        self.assertIsNone(rows[1][-1])
+
+    def test_chunks(self):
+        # A query per full chunk and an empty one to detect the end.
+        with self.assertNumQueries(4):
+            rows = list(exports.iterate_notifications(chunk_size=1))
+        self.assertEqual([row[0] for row in rows], [n.id for n in self.notifications])
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(exports.iterate_notifications(chunk_size=2))), 3)
+
+    def test_csv_lines(self):
+        lines = list(exports.csv_lines([(1, "slug", "Title", "a@b.c", "x", "y", None)]))
+        self.assertEqual(
+            lines,
+            [
+                "id,post_slug,post_title,email,created,sent,read\r\n",
+                "1,slug,Title,a@b.c,x,y,\r\n",
+            ],
+        )
+
+    def test_jsonl_lines(self):
+        lines = list(
+            exports.jsonl_lines([(1, "slug", "Title", "a@b.c", "x", "y", None)])
+        )
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["read"], None)
+        self.assertEqual(json.loads(lines[0])["post_slug"], "slug")
@@ -6,6 +6,23 @@ class TestSubscriptionForm(DataTestCase):
     def test_categories_field_uses_slug_for_value(self):
         form = SubscriptionForm()
         self.assertEqual(
-            form.fields["categories"].prepare_value(self.data.social),
-            self.data.social.slug,
+            form.fields["categories"].choices,
+            [
+                (self.data.career.slug, self.data.career.title),
+                (self.data.social.slug, self.data.social.title),
+            ],
         )
+
+    def test_initial(self):
+        form = SubscriptionForm(instance=self.data.subscription)
+        self.assertEqual(
+            form.initial["categories"], [self.data.career.slug, self.data.social.slug]
+        )
+
+    def test_save(self):
+        form = SubscriptionForm(
+            {"categories": [self.data.social.slug]}, instance=self.data.subscription
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(self.data.subscription.categories.get(), self.data.social)
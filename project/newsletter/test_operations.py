@@ -1,7 +1,10 @@
+from datetime import timedelta
+
 from django.core.cache import cache
+from django.utils import timezone
 
 from project.newsletter import operations
-from project.newsletter.models import SubscriptionNotification
+from project.newsletter.models import Post, SubscriptionNotification
 from project.newsletter.test import DataTestCase
 
 
@@ -16,10 +19,104 @@ class TestMarkAsRead(DataTestCase):
         self.assertIsNotNone(notification.read)
 
 
-class TestCheckIsTrending(DataTestCase):
-    def test_check_is_trending(self):
-        cache.delete(f"post.trending.{self.data.all_post.slug}")
-        for i in range(6):
-            self.assertFalse(operations.check_is_trending(self.data.all_post))
-        self.assertTrue(operations.check_is_trending(self.data.all_post))
-        cache.delete(f"post.trending.{self.data.all_post.slug}")
+class TestMarkManyAsRead(DataTestCase):
+    def test_mark_many_as_read(self):
+        read = timezone.now() - timedelta(minutes=5)
+        notification = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+        )
+        other = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.career_post,
+        )
+        with self.assertNumQueries(2):
+            updated = operations.mark_many_as_read(
+                {
+                    (self.data.all_post.id, self.data.subscription.user_id): read,
+                    # Users without a subscription are ignored.
+                    (self.data.all_post.id, self.user.id): timezone.now(),
+                }
+            )
+        self.assertEqual(updated, 1)
+        notification.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(notification.read, read)
+        self.assertIsNone(other.read)
+
+    def test_no_subscriptions(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                operations.mark_many_as_read(
+                    {(self.data.all_post.id, self.user.id): timezone.now()}
+                ),
+                0,
+            )
+
+
+class TestSetPublished(DataTestCase):
+    def test_set_published(self):
+        cache.set(f"post.detail.{self.data.all_post.slug}", "cached")
+        posts = Post.objects.filter(
+            id__in=[self.data.all_post.id, self.data.career_post.id]
+        )
+        # A select and an update per chunk and a select to find the end.
+        with self.assertNumQueries(5):
+            self.assertEqual(operations.set_published(posts, False, chunk_size=1), 2)
+        self.assertIsNone(cache.get(f"post.detail.{self.data.all_post.slug}"))
+        self.assertEqual(
+            set(Post.objects.unpublished()),
+            {self.data.all_post, self.data.career_post},
+        )
+        self.assertTrue(Post.objects.get(id=self.data.private_post.id).is_published)
+        # Posts that are already unpublished aren't updated again.
+        self.assertEqual(operations.set_published(posts, False), 0)
+        self.assertEqual(operations.set_published(Post.objects.all(), True), 2)
+
+
+class TestNotificationActions(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.sent = timezone.now() - timedelta(days=1)
+        self.unsent = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription, post=self.data.career_post
+        )
+        self.unread = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=self.sent,
+        )
+        self.read = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.private_post,
+            sent=self.sent,
+            read=self.sent,
+        )
+
+    def test_mark_notifications_read(self):
+        self.assertEqual(
+            operations.mark_notifications_read(
+                SubscriptionNotification.objects.all(), chunk_size=1
+            ),
+            2,
+        )
+        self.unsent.refresh_from_db()
+        self.read.refresh_from_db()
+        self.assertIsNotNone(self.unsent.read)
+        self.assertEqual(self.read.read, self.sent)
+
+    def test_resend_notifications(self):
+        self.assertEqual(
+            operations.resend_notifications(
+                SubscriptionNotification.objects.all(), chunk_size=1
+            ),
+            2,
+        )
+        for notification in [self.unread, self.read]:
+            notification.refresh_from_db()
+            self.assertIsNone(notification.sent)
+            self.assertIsNone(notification.read)
+        self.assertEqual(
+            set(Post.objects.needs_notifications_sent()),
+            {self.data.all_post, self.data.private_post},
+        )
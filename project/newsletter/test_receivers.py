@@ -1,8 +1,12 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.test import Client
 from django.urls import reverse
+from django.utils import timezone
 
-from project.newsletter.models import Post
+from project.newsletter.models import DailyRollup, Post, Subscription
 from project.newsletter.test import DataTestCase
 
 
@@ -31,3 +35,80 @@ class TestPostOnSave(DataTestCase):
                 reverse("newsletter:view_post", kwargs={"slug": post.slug})
             )
             self.assertEqual(response.status_code, 200)
+
+
+class TestDailyRollupReceivers(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.today = timezone.localdate()
+
+    def counts(self, category=None):
+        rollup = DailyRollup.objects.filter(day=self.today, category=category).first()
+        return (rollup.posts, rollup.subscriptions) if rollup else (0, 0)
+
+    def test_post(self):
+        self.assertEqual(self.counts(), (3, 1))
+        post = Post.objects.create(
+            slug="rollup", title="rollup", author=self.data.author
+        )
+        self.assertEqual(self.counts(), (4, 1))
+        post.categories.set([self.data.career, self.data.social])
+        self.assertEqual(self.counts(self.data.career), (3, 1))
+        self.assertEqual(self.counts(self.data.social), (3, 1))
+        post.categories.set([self.data.social])
+        self.assertEqual(self.counts(self.data.career), (2, 1))
+        self.assertEqual(self.counts(self.data.social), (3, 1))
+        # Adding an existing category is a no-op.
+        post.categories.add(self.data.social)
+        self.assertEqual(self.counts(self.data.social), (3, 1))
+        post.delete()
+        self.assertEqual(self.counts(), (3, 1))
+        self.assertEqual(self.counts(self.data.social), (2, 1))
+
+    def test_subscription(self):
+        subscription = Subscription.objects.create(
+            user=User.objects.create_user(username="rollup")
+        )
+        self.assertEqual(self.counts(), (3, 1))
+        subscription.categories.set([self.data.career, self.data.social])
+        self.assertEqual(self.counts(), (3, 2))
+        self.assertEqual(self.counts(self.data.career), (2, 2))
+        subscription.categories.remove(self.data.career)
+        self.assertEqual(self.counts(), (3, 2))
+        self.assertEqual(self.counts(self.data.career), (2, 1))
+        subscription.categories.clear()
+        self.assertEqual(self.counts(), (3, 1))
+        self.assertEqual(self.counts(self.data.social), (2, 1))
+
+    def test_subscription_reverse(self):
+        subscription = Subscription.objects.create(
+            user=User.objects.create_user(username="rollup")
+        )
+        self.data.career.subscriptions.add(subscription)
+        self.assertEqual(self.counts(), (3, 2))
+        self.assertEqual(self.counts(self.data.career), (2, 2))
+        self.data.career.subscriptions.clear()
+        self.assertEqual(self.counts(), (3, 1))
+        self.assertEqual(self.counts(self.data.career), (2, 0))
+
+    def test_subscription_delete(self):
+        self.data.subscription.user.delete()
+        self.assertEqual(self.counts(), (3, 0))
+        self.assertEqual(self.counts(self.data.career), (2, 0))
+        self.assertEqual(self.counts(self.data.social), (2, 0))
+
+    def test_subscription_created_day(self):
+        subscription = Subscription.objects.create(
+            user=User.objects.create_user(username="rollup")
+        )
+        Subscription.objects.filter(id=subscription.id).update(
+            created=timezone.now() - timedelta(days=5)
+        )
+        subscription.categories.set([self.data.career])
+        self.assertEqual(self.counts(), (3, 1))
+        self.assertEqual(
+            DailyRollup.objects.get(
+                day=self.today - timedelta(days=5), category=None
+            ).subscriptions,
+            1,
+        )
@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from project.newsletter import registry
+from project.newsletter.models import Category
+from project.newsletter.test import DataTestCase
+
+
+class TestRegistry(DataTestCase):
+    def test_by_slug(self):
+        self.assertEqual(
+            registry.by_slug(),
+            {
+                "career": registry.CategoryEntry(
+                    id=self.data.career.id, slug="career", title="Career"
+                ),
+                "social": registry.CategoryEntry(
+                    id=self.data.social.id, slug="social", title="Social"
+                ),
+            },
+        )
+        self.assertEqual(
+            list(registry.by_id()), [self.data.career.id, self.data.social.id]
+        )
+
+    def test_loaded_once(self):
+        registry.by_slug()
+        with self.assertNumQueries(0):
+            registry.by_slug()
+            registry.get_category("career")
+
+    def test_invalidated_on_save(self):
+        registry.by_slug()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(title="Art", slug="art")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(registry.get_category("art").title, "Art")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            registry.choices(),
+            [("art", "Art"), ("career", "Career"), ("social", "Social")],
+        )
+
+    def test_invalidated_on_delete(self):
+        registry.by_slug()
+        self.data.social.posts.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data.social.delete()
+        with self.assertRaises(Category.DoesNotExist):
+            registry.get_category("social")
+
+    def test_invalidated_on_commit(self):
+        registry.by_slug()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(title="Art", slug="art")
+            # Until the save commits, the registry keeps the old categories.
+            self.assertNotIn("art", registry.by_slug())
+        self.assertIn("art", registry.by_slug())
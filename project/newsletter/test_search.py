@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from project.newsletter import search
+from project.newsletter.models import Post
+from project.newsletter.test import DataTestCase
+
+
+def matching(text):
+    return set(
+        Post.objects.filter(
+            id__in=search.matching_ids(search.match_query(text))
+        ).values_list("slug", flat=True)
+    )
+
+
+class TestMatchQuery(DataTestCase):
+    def test_match_query(self):
+        self.assertEqual(search.match_query("debug tool"), '"debug" "tool"*')
+        self.assertEqual(search.match_query('a "b" OR c-d'), '"a" "b" "OR" "c" "d"*')
+        self.assertIsNone(search.match_query(" -- "))
+
+
+class TestIndex(DataTestCase):
+    def test_indexed_on_save(self):
+        self.assertEqual(matching("category"), {"all-post"})
+        self.assertEqual(matching("post"), {"all-post", "career-post", "private-post"})
+        self.data.all_post.title = "Networking"
+        self.data.all_post.save()
+        self.assertEqual(matching("netw"), {"all-post"})
+        self.assertEqual(matching("category"), set())
+
+    def test_removed_on_delete(self):
+        self.data.career_post.delete()
+        self.assertEqual(matching("post"), {"all-post", "private-post"})
+
+    def test_rebuild(self):
+        Post.objects.filter(id=self.data.all_post.id).update(title="Bypassed")
+        self.assertEqual(matching("Bypassed"), set())
+        self.assertEqual(search.rebuild(), 3)
+        self.assertEqual(matching("Bypassed"), {"all-post"})
+
+    def test_is_available(self):
+        self.assertTrue(search.is_available())
+        with patch("project.newsletter.search._sqlite_has_fts5", return_value=False):
+            self.assertFalse(search.is_available())
+
+
+class TestSearchPosts(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.content_post = Post.objects.create(
+            author=self.data.author,
+            title="Other",
+            slug="hidden-slug",
+            summary="Debugging",
+            content="Debugging the debugger",
+        )
+        self.title_post = Post.objects.create(
+            author=self.data.author,
+            title="Debugging",
+            slug="debugging-title",
+            summary="Summary",
+            content="Content",
+        )
+
+    def ids(self, results):
+        return [post_id for _, post_id in results]
+
+    def test_ranking(self):
+        results = search.search_posts(Post.objects.all(), "debug")
+        self.assertEqual(self.ids(results), [self.title_post.id, self.content_post.id])
+        self.assertLess(results[0][0], results[1][0])
+
+    def test_slug_not_searched(self):
+        self.assertEqual(search.search_posts(Post.objects.all(), "hidden"), [])
+
+    def test_limited_to_queryset(self):
+        results = search.search_posts(
+            Post.objects.filter(id=self.content_post.id), "debug"
+        )
+        self.assertEqual(self.ids(results), [self.content_post.id])
+
+    def test_cursor(self):
+        posts = Post.objects.all()
+        first = search.search_posts(posts, "post", limit=2)
+        second = search.search_posts(posts, "post", after=first[-1], limit=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(
+            set(self.ids(first + second)),
+            {
+                self.data.all_post.id,
+                self.data.career_post.id,
+                self.data.private_post.id,
+            },
+        )
+
+    def test_no_words(self):
+        self.assertEqual(search.search_posts(Post.objects.all(), "--"), [])
+
+    def test_fallback(self):
+        with patch("project.newsletter.search._sqlite_has_fts5", return_value=False):
+            posts = Post.objects.all()
+            results = search.search_posts(posts, "debugging")
+            self.assertEqual(
+                results, [(0.0, self.content_post.id), (0.0, self.title_post.id)]
+            )
+            self.assertEqual(
+                search.search_posts(posts, "debugging", after=results[0]),
+                [(0.0, self.title_post.id)],
+            )
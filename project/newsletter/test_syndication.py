@@ -1,3 +1,9 @@
+from unittest.mock import patch
+
+from django.utils.http import http_date
+
+from project.newsletter import operations, registry, syndication
+from project.newsletter.models import Category, Post
 from project.newsletter.syndication import RecentCategorizedPostsFeed, RecentPostsFeed
 from project.newsletter.test import DataTestCase
 
@@ -8,7 +14,10 @@ class TestRecentPostsFeed(DataTestCase):
         self.feed = RecentPostsFeed()
 
     def test_items(self):
-        self.assertEqual(self.feed.items().first(), self.data.career_post)
+        self.assertEqual(
+            self.feed.items(syndication.FeedOptions())[0], self.data.career_post
+        )
+        self.assertEqual(len(self.feed.items(syndication.FeedOptions(limit=1))), 1)
 
     def test_item_title(self):
         self.assertEqual(
@@ -17,6 +26,10 @@ class TestRecentPostsFeed(DataTestCase):
 
     def test_item_description(self):
         self.assertEqual(self.feed.item_description(self.data.career_post), "")
+        (item,) = self.feed.items(syndication.FeedOptions(mode="full", limit=1))
+        self.assertEqual(self.feed.item_description(item), "<h1>Title</h1>")
+        (item,) = self.feed.items(syndication.FeedOptions(mode="summary", limit=1))
+        self.assertEqual(self.feed.item_description(item), "<h2>Summary</h2>")
 
     def test_item_pubdate(self):
         self.assertEqual(
@@ -37,9 +50,15 @@ class TestRecentCategorizedPostsFeed(DataTestCase):
 
     def test_get_object(self):
         self.assertEqual(
-            self.feed.get_object(self.rf.get("/"), self.data.career.slug),
-            self.data.career,
+            self.feed.get_object(self.rf.get("/"), self.data.career.slug).category,
+            registry.CategoryEntry(
+                id=self.data.career.id,
+                slug=self.data.career.slug,
+                title=self.data.career.title,
+            ),
         )
+        with self.assertRaises(Category.DoesNotExist):
+            self.feed.get_object(self.rf.get("/"), "missing")
 
     def test_item_title(self):
         self.assertEqual(
@@ -50,6 +69,153 @@ class TestRecentCategorizedPostsFeed(DataTestCase):
         self.assertEqual(self.feed.item_link(self.data.career), "/p/?category=career")
 
     def test_items(self):
+        career = self.feed.get_object(self.rf.get("/"), self.data.career.slug)
+        items = self.feed.items(career)
+        self.assertEqual(items, [self.data.career_post, self.data.all_post])
+        self.assertEqual(
+            self.feed.item_categories(items[1]),
+            [self.data.career.title, self.data.social.title],
+        )
+
+
+class TestFeedOptions(DataTestCase):
+    def test_from_request(self):
+        self.assertEqual(
+            syndication.FeedOptions.from_request(self.rf.get("/")),
+            syndication.FeedOptions(mode="", limit=syndication.FEED_LIMIT),
+        )
+        self.assertEqual(
+            syndication.FeedOptions.from_request(
+                self.rf.get("/", {"mode": "full", "limit": "5"})
+            ),
+            syndication.FeedOptions(mode="full", limit=5),
+        )
+
+    def test_invalid(self):
+        self.assertEqual(
+            syndication.FeedOptions.from_request(
+                self.rf.get("/", {"mode": "other", "limit": "many"})
+            ),
+            syndication.FeedOptions(),
+        )
+        self.assertEqual(
+            syndication.FeedOptions.from_request(
+                self.rf.get("/", {"limit": "100000"})
+            ).limit,
+            syndication.FEED_MAX_LIMIT,
+        )
         self.assertEqual(
-            self.feed.items(self.data.career).first(), self.data.career_post
+            syndication.FeedOptions.from_request(
+                self.rf.get("/", {"limit": "0"})
+            ).limit,
+            1,
         )
+
+
+class TestRenderMarkdown(DataTestCase):
+    def test_render_markdown(self):
+        posts = [self.data.all_post, self.data.career_post]
+        expected = {post.id: "<h1>Title</h1>" for post in posts}
+        self.assertEqual(syndication.render_markdown(posts, "content"), expected)
+        with patch("project.newsletter.syndication.markdownify") as markdownify:
+            self.assertEqual(syndication.render_markdown(posts, "content"), expected)
+        markdownify.assert_not_called()
+
+    def test_rendered_again_on_save(self):
+        syndication.render_markdown([self.data.all_post], "content")
+        self.data.all_post.content = "*Changed*"
+        self.data.all_post.save()
+        self.assertEqual(
+            syndication.render_markdown([self.data.all_post], "content"),
+            {self.data.all_post.id: "<p><em>Changed</em></p>"},
+        )
+
+
+class TestFeedCaching(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            syndication.invalidate()
+
+    def test_conditional_get(self):
+        response = self.client.get("/rss/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Last-Modified"],
+            http_date(self.data.career_post.publish_date.timestamp()),
+        )
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/rss/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/rss/", headers={"if-modified-since": response["Last-Modified"]}
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_num_queries(self):
+        registry.by_id()
+        # The posts and their through rows.
+        with self.assertNumQueries(2):
+            self.client.get(f"/rss/{self.data.career.slug}/")
+
+    def test_full_mode(self):
+        response = self.client.get("/rss/", {"mode": "full", "limit": "1"})
+        self.assertContains(response, "&lt;h1&gt;Title&lt;/h1&gt;", count=1)
+        self.assertNotEqual(response.content, self.client.get("/rss/").content)
+
+    def test_cached_per_scheme(self):
+        http = self.client.get("/rss/")
+        https = self.client.get("/rss/", secure=True)
+        self.assertContains(https, "<link>https://example.com/p/</link>")
+        self.assertContains(http, "<link>http://example.com/p/</link>")
+        self.assertNotEqual(http.content, https.content)
+
+    def test_invalidated_on_commit(self):
+        etag = self.client.get("/rss/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data.career_post.title = "Updated title"
+            self.data.career_post.save()
+            # A poll before the commit keeps the cached body.
+            response = self.client.get("/rss/", headers={"if-none-match": etag})
+            self.assertEqual(response.status_code, 304)
+        response = self.client.get("/rss/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_category(self):
+        self.assertEqual(self.client.get("/rss/missing/").status_code, 404)
+
+    def test_invalidated_by_category_changes(self):
+        self.client.get("/rss/")
+        self.data.career.title = "Jobs"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data.career.save()
+        self.assertContains(self.client.get("/rss/"), "<category>Jobs</category>")
+
+    def test_cached_per_category(self):
+        career = self.client.get(f"/rss/{self.data.career.slug}/")
+        social = self.client.get(f"/rss/{self.data.social.slug}/")
+        self.assertNotEqual(career["ETag"], social["ETag"])
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/rss/{self.data.career.slug}/")
+        self.assertEqual(response.content, career.content)
+
+    def test_invalidated_by_post_changes(self):
+        etag = self.client.get("/rss/")["ETag"]
+        self.data.career_post.title = "Updated title"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data.career_post.save()
+        response = self.client.get("/rss/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Updated title")
+
+    def test_invalidated_by_bulk_publish(self):
+        etag = self.client.get("/rss/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            operations.set_published(
+                Post.objects.filter(id=self.data.career_post.id), False
+            )
+        response = self.client.get("/rss/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.data.career_post.title)
@@ -5,7 +5,11 @@ from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
 
 from project.newsletter.models import Post
-from project.newsletter.templatetags.newsletter_utils import is_ellipsis, nice_datetime
+from project.newsletter.templatetags.newsletter_utils import (
+    is_ellipsis,
+    latency,
+    nice_datetime,
+)
 
 
 class TestIsEllipsis(SimpleTestCase):
@@ -14,6 +18,13 @@ class TestIsEllipsis(SimpleTestCase):
         self.assertFalse(is_ellipsis("..."))
 
 
+class TestLatency(SimpleTestCase):
+    def test_latency(self):
+        self.assertEqual(latency(None), "-")
+        self.assertEqual(latency(timedelta(minutes=5)), "< 5\xa0minutes")
+        self.assertEqual(latency(timedelta(days=30)), "> 1\xa0month")
+
+
 class TestNiceDatetime(TestCase):
     def test_nice_datetime(self):
         post = Post(created=timezone.now())
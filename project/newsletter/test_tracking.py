@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import override_settings
+from django.utils import timezone
+
+from project.newsletter import trending
+from project.newsletter.models import SubscriptionNotification
+from project.newsletter.test import DataTestCase
+from project.newsletter.tracking import ViewTracker
+
+
+class TestViewTracker(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tracker = ViewTracker()
+        trending.clear(self.data.all_post.slug)
+
+    def tearDown(self) -> None:
+        trending.clear(self.data.all_post.slug)
+        super().tearDown()
+
+    def test_flush_immediately(self):
+        self.tracker.record_view(self.data.all_post)
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 1)
+
+    @override_settings(VIEW_TRACKING_FLUSH_INTERVAL=60)
+    @patch.object(ViewTracker, "start")
+    def test_buffered(self, start):
+        notification = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=timezone.now(),
+        )
+        user = self.data.subscription.user
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.tracker.record_view(self.data.all_post)
+                self.tracker.record_read(self.data.all_post, user)
+        start.assert_called_with(60)
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 0)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.read)
+
+        # The reads are merged into a single UPDATE.
+        with self.assertNumQueries(2):
+            self.tracker.flush()
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 3)
+        self.assertIn(self.data.all_post.slug, trending.top(trending.LEADERBOARD_SIZE))
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.read)
+
+        # The buffer is emptied by the flush.
+        with self.assertNumQueries(0):
+            self.tracker.flush()
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 3)
+
+    @override_settings(VIEW_TRACKING_FLUSH_INTERVAL=60)
+    @patch.object(ViewTracker, "start")
+    def test_failed_flush(self, start):
+        notification = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=timezone.now(),
+        )
+        self.tracker.record_view(self.data.all_post)
+        self.tracker.record_read(self.data.all_post, self.data.subscription.user)
+        with patch(
+            "project.newsletter.operations.mark_many_as_read",
+            side_effect=OperationalError("database is locked"),
+        ):
+            with self.assertRaises(OperationalError):
+                self.tracker.flush()
+        # The written views aren't buffered again, the unwritten reads are.
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 1)
+        self.tracker.flush()
+        self.assertEqual(trending.count_views(self.data.all_post.slug), 1)
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.read)
+
+    @override_settings(VIEW_TRACKING_FLUSH_INTERVAL=60)
+    @patch("project.newsletter.tracking.threading.Thread")
+    def test_start_once(self, thread):
+        thread.return_value.is_alive.return_value = True
+        self.tracker.record_view(self.data.all_post)
+        self.tracker.record_view(self.data.all_post)
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once_with()
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from project.newsletter import trending
+
+
+class TestTrending(SimpleTestCase):
+    slug = "trending-post"
+
+    def setUp(self) -> None:
+        trending.clear(self.slug)
+
+    def tearDown(self) -> None:
+        trending.clear(self.slug)
+
+    def test_keys(self):
+        keys = trending.keys(self.slug)
+        self.assertEqual(len(keys), trending.BUCKET_COUNT)
+        self.assertEqual(len(set(keys)), trending.BUCKET_COUNT)
+        self.assertTrue(keys[-1].startswith("post.trending.trending-post."))
+
+    def test_record_views(self):
+        self.assertEqual(trending.record_views(self.slug), 1)
+        self.assertEqual(trending.record_views(self.slug, 3), 4)
+        self.assertEqual(trending.count_views(self.slug), 4)
+
+    def test_is_trending(self):
+        trending.record_views(self.slug, trending.THRESHOLD)
+        self.assertFalse(trending.is_trending(self.slug))
+        trending.record_views(self.slug)
+        self.assertTrue(trending.is_trending(self.slug))
+
+    def test_views_expire_from_window(self):
+        trending.record_views(self.slug, 6)
+        later = timezone.now() + timedelta(seconds=trending.WINDOW_SECONDS)
+        with patch("project.newsletter.trending.timezone.now", return_value=later):
+            self.assertEqual(trending.count_views(self.slug), 0)
+
+    def test_increment_recreates_evicted_bucket(self):
+        key = trending.keys(self.slug)[-1]
+        # Simulate the bucket being evicted between add and incr.
+        with patch.object(cache, "add", side_effect=[False, True]):
+            with patch.object(cache, "incr", side_effect=ValueError):
+                self.assertEqual(trending.increment(key), 1)
+
+    def test_concurrent_views(self):
+        threads, views_per_thread = 8, 250
+
+        def view(_):
+            for _ in range(views_per_thread):
+                trending.record_views(self.slug)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(view, range(threads)))
+        self.assertEqual(trending.count_views(self.slug), threads * views_per_thread)
+
+
+class TestLeaderboard(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.delete(trending.LEADERBOARD_KEY)
+
+    def tearDown(self) -> None:
+        cache.delete(trending.LEADERBOARD_KEY)
+
+    def test_empty(self):
+        self.assertEqual(trending.top(), [])
+
+    def test_top(self):
+        trending.update_leaderboard({"a": 1, "b": 3, "c": 2})
+        trending.update_leaderboard({"a": 3})
+        self.assertEqual(trending.top(), ["a", "b", "c"])
+        self.assertEqual(trending.top(2), ["a", "b"])
+
+    def test_decay(self):
+        now = time.time()
+        trending.update_leaderboard({"old": 4}, now=now)
+        later = now + trending.LEADERBOARD_HALF_LIFE * 2
+        # The old views are now worth 1, so 2 new views rank higher.
+        trending.update_leaderboard({"new": 2}, now=later)
+        self.assertEqual(trending.top(), ["new", "old"])
+        self.assertEqual(
+            cache.get(trending.LEADERBOARD_KEY)["scores"], [("new", 2), ("old", 1)]
+        )
+
+    def test_decayed_scores_are_dropped(self):
+        now = time.time()
+        trending.update_leaderboard({"old": 1}, now=now)
+        trending.update_leaderboard(
+            {"new": 1}, now=now + trending.LEADERBOARD_HALF_LIFE * 10
+        )
+        self.assertEqual(trending.top(), ["new"])
+
+    @patch("project.newsletter.trending.LEADERBOARD_SIZE", 2)
+    def test_size(self):
+        trending.update_leaderboard({"a": 1, "b": 3, "c": 2})
+        self.assertEqual(trending.top(), ["b", "c"])
+
+    @patch("project.newsletter.trending.LEADERBOARD_LOCK_WAIT", 0)
+    def test_locked(self):
+        lock = f"{trending.LEADERBOARD_KEY}.lock"
+        cache.add(lock, True)
+        try:
+            trending.update_leaderboard({"a": 1})
+            self.assertEqual(trending.top(), ["a"])
+            # The lock held by another writer is left alone.
+            self.assertTrue(cache.get(lock))
+        finally:
+            cache.delete(lock)
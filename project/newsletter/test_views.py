@@ -1,14 +1,24 @@
-from datetime import timedelta
+from datetime import UTC, date, datetime, timedelta
 from io import BytesIO
 from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from PIL import Image
 
-from project.newsletter.models import Post, Subscription, SubscriptionNotification
+from project.newsletter import caching, trending, views
+from project.newsletter.models import (
+    Category,
+    DailyRollup,
+    Post,
+    Subscription,
+    SubscriptionNotification,
+)
 from project.newsletter.test import DataTestCase
 
 
@@ -41,6 +51,31 @@ class TestLanding(DataTestCase):
             [self.data.private_post, self.data.career_post, self.data.all_post],
         )
 
+    def test_trending_posts(self):
+        cache.delete(trending.LEADERBOARD_KEY)
+        self.addCleanup(cache.delete, trending.LEADERBOARD_KEY)
+        trending.update_leaderboard(
+            {
+                self.data.career_post.slug: 1,
+                self.data.private_post.slug: 3,
+                self.data.all_post.slug: 2,
+                "deleted": 4,
+            }
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.context["trending_posts"],
+            [self.data.all_post, self.data.career_post],
+        )
+        self.assertContains(response, self.data.all_post.title)
+
+        self.client.force_login(self.data.subscription.user)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.context["trending_posts"],
+            [self.data.private_post, self.data.all_post, self.data.career_post],
+        )
+
 
 class TestListPosts(DataTestCase):
     url = reverse("newsletter:list_posts")
@@ -94,6 +129,67 @@ class TestListPosts(DataTestCase):
         )
 
 
+class TestSearchPosts(DataTestCase):
+    url = reverse("newsletter:search_posts")
+
+    def test_empty(self):
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, "posts/search.html")
+        self.assertEqual(response.context["posts"], [])
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_unauthenticated(self):
+        response = self.client.get(self.url, {"q": "post"})
+        self.assertEqual(
+            set(response.context["posts"]),
+            {self.data.all_post, self.data.career_post},
+        )
+
+    def test_authenticated(self):
+        Post.objects.create(
+            author=self.data.author, title="Draft post", slug="draft", content="c"
+        )
+        self.client.force_login(self.data.subscription.user)
+        response = self.client.get(self.url, {"q": "post"})
+        self.assertEqual(
+            set(response.context["posts"]),
+            {self.data.all_post, self.data.career_post, self.data.private_post},
+        )
+
+    def test_bulk_inserted(self):
+        # fake_data inserts the posts with bulk_create, bypassing the receivers.
+        call_command(
+            "fake_data",
+            posts=1,
+            users=1,
+            notification_posts=1,
+            workers=1,
+            end_date=date(2024, 6, 1),
+        )
+        response = self.client.get(self.url, {"q": "debugging"})
+        self.assertEqual(
+            [post.slug for post in response.context["posts"]], ["debugging-like-a-pro"]
+        )
+
+    @patch("project.newsletter.views.SEARCH_POSTS_PAGE_SIZE", 1)
+    def test_cursor(self):
+        response = self.client.get(self.url, {"q": "post"})
+        first = response.context["posts"]
+        cursor = response.context["next_cursor"]
+        self.assertEqual(len(first), 1)
+        self.assertContains(response, "More results")
+        response = self.client.get(self.url, {"q": "post", "cursor": cursor})
+        second = response.context["posts"]
+        self.assertEqual(
+            set(first + second), {self.data.all_post, self.data.career_post}
+        )
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"q": "post", "cursor": "[0, 1]"})
+        self.assertEqual(response.status_code, 404)
+
+
 class TestViewPost(DataTestCase):
     def test_unauthenticated(self):
         response = self.client.get(
@@ -422,7 +518,13 @@ class TestUpdateSubscription(DataTestCase):
 
 
 class TestAnalytics(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.delete(views.ANALYTICS_KEY)
+        self.addCleanup(cache.delete, views.ANALYTICS_KEY)
+
     def test_basic(self):
+        # The rollups are kept up to date without refreshing them.
         self.client.force_login(self.user)
         response = self.client.get(reverse("newsletter:analytics"))
         self.assertTemplateUsed(response, "staff/analytics.html")
@@ -466,6 +568,7 @@ class TestAnalytics(DataTestCase):
             )
             subscription.categories.set([self.data.career, self.data.social])
 
+        call_command("refresh_analytics")
         self.client.force_login(self.user)
         response = self.client.get(reverse("newsletter:analytics"))
         self.assertTemplateUsed(response, "staff/analytics.html")
@@ -497,3 +600,183 @@ class TestAnalytics(DataTestCase):
                 self.data.social.title: 2,
             },
         )
+
+    @override_settings(TIME_ZONE="America/Chicago")
+    def test_windows_use_local_days(self):
+        # May 31st in Chicago, so the 30 day window starts on May 1st.
+        now = datetime(2024, 6, 1, 2, tzinfo=UTC)
+        DailyRollup.objects.create(day=date(2024, 5, 1), posts=1)
+        with patch("django.utils.timezone.now", return_value=now):
+            aggregates = views._compute_analytics()["aggregates"]
+        self.assertEqual(aggregates["Posts (30 days)"], 4)
+
+    def test_empty_category(self):
+        empty = Category.objects.create(title="Empty", slug="empty")
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("newsletter:analytics"))
+        self.assertEqual(
+            response.context["subscription_category_aggregates"][empty.title], 0
+        )
+        self.assertEqual(response.context["post_category_aggregates"][empty.title], 0)
+
+    def test_num_queries(self):
+        self.client.force_login(self.user)
+        # Session, user, refreshing the changed notification rollups (the
+        # latest refresh, the stale rollups, the counts and the latency
+        # buckets), the total and category daily rollups, the categories and
+        # the notification rollups.
+        with self.assertNumQueries(11):
+            self.client.get(reverse("newsletter:analytics"))
+        # The cached analytics are used.
+        with self.assertNumQueries(2):
+            self.client.get(reverse("newsletter:analytics"))
+
+    def test_stale_refreshes_in_background(self):
+        self.client.force_login(self.user)
+        caching.set_value(views.ANALYTICS_KEY, {"computed": "stale"}, timeout=-1)
+        with patch("project.newsletter.caching.run_in_background") as background:
+            response = self.client.get(reverse("newsletter:analytics"))
+        self.assertEqual(response.context["computed"], "stale")
+        background.assert_called_once()
+        # Run the background refresh.
+        func, *args = background.call_args.args
+        func(*args)
+        response = self.client.get(reverse("newsletter:analytics"))
+        self.assertNotEqual(response.context["computed"], "stale")
+        self.assertEqual(response.context["aggregates"]["Posts"], 3)
+
+    def test_recompute(self):
+        url = reverse("newsletter:recompute_analytics")
+        user = User.objects.create_user(username="basic")
+        self.client.force_login(user)
+        response = self.client.post(url)
+        self.assertRedirects(response, f"{settings.LOGIN_URL}?next={url}")
+
+        self.client.force_login(self.user)
+        caching.set_value(views.ANALYTICS_KEY, {"computed": "stale"}, timeout=60)
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=timezone.now(),
+        )
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse("newsletter:analytics"))
+        analytics = cache.get(views.ANALYTICS_KEY).value
+        self.assertNotEqual(analytics["computed"], "stale")
+        # The notification rollups were refreshed before recomputing.
+        self.assertEqual(analytics["notification_post_stats"][0]["sent"], 1)
+
+    def test_notification_stats(self):
+        sent = timezone.now() - timedelta(days=1)
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=sent,
+            read=sent + timedelta(minutes=10),
+        )
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription, post=self.data.career_post, sent=sent
+        )
+        call_command("refresh_analytics")
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("newsletter:analytics"))
+        all_post = {
+            "title": self.data.all_post.title,
+            "sent": 1,
+            "read": 1,
+            "open_rate": 100.0,
+            "p50": timedelta(minutes=15),
+            "p90": timedelta(minutes=15),
+            "p99": timedelta(minutes=15),
+        }
+        career_post = {
+            "title": self.data.career_post.title,
+            "sent": 1,
+            "read": 0,
+            "open_rate": 0.0,
+            "p50": None,
+            "p90": None,
+            "p99": None,
+        }
+        self.assertEqual(
+            response.context["notification_post_stats"], [career_post, all_post]
+        )
+        self.assertEqual(
+            response.context["notification_category_stats"],
+            [
+                {
+                    "title": self.data.career.title,
+                    "sent": 2,
+                    "read": 1,
+                    "open_rate": 50.0,
+                    "p50": timedelta(minutes=15),
+                    "p90": timedelta(minutes=15),
+                    "p99": timedelta(minutes=15),
+                },
+                {**all_post, "title": self.data.social.title},
+            ],
+        )
+        self.assertContains(response, "&lt; 15\xa0minutes")
+
+    def test_notification_stats_refreshed(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("newsletter:analytics"))
+        self.assertEqual(response.context["notification_post_stats"], [])
+        # The rollups are refreshed without the refresh_analytics command.
+        sent = timezone.now() - timedelta(days=1)
+        SubscriptionNotification.objects.create(
+            subscription=self.data.subscription, post=self.data.all_post, sent=sent
+        )
+        cache.delete(views.ANALYTICS_KEY)
+        response = self.client.get(reverse("newsletter:analytics"))
+        self.assertEqual(
+            [
+                (stats["title"], stats["sent"])
+                for stats in response.context["notification_post_stats"]
+            ],
+            [(self.data.all_post.title, 1)],
+        )
+
+
+class TestExportNotifications(DataTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.notification = SubscriptionNotification.objects.create(
+            subscription=self.data.subscription,
+            post=self.data.all_post,
+            sent=timezone.now(),
+        )
+
+    def test_requires_staff(self):
+        user = User.objects.create_user(username="nonstaff")
+        self.client.force_login(user)
+        response = self.client.get(reverse("newsletter:export_notifications"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("newsletter:export_notifications"))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("notifications.csv", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,post_slug,post_title,email,created,sent,read")
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f"{self.notification.id},all-post,"))
+        self.assertTrue(lines[1].endswith(","))
+
+    def test_jsonl(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("newsletter:export_notifications"), {"format": "jsonl"}
+        )
+        self.assertEqual(response["Content-Type"], "application/jsonl")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"read": null', lines[0])
+
+    def test_invalid_format(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("newsletter:export_notifications"), {"format": "xml"}
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,140 @@
+"""
+This file contains the in-process buffer for post views and reads.
+
+The post detail view records events here rather than writing them to the
+cache and database before responding. A background thread flushes the
+buffer every ``VIEW_TRACKING_FLUSH_INTERVAL`` seconds, merging the events
+so each flush costs a handful of cache operations and UPDATE statements
+no matter how many requests were served. When the interval is ``None``
+the buffer is flushed immediately, which is what the tests use.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.utils import timezone
+
+from project.newsletter import operations, trending
+from project.newsletter.models import Post
+
+logger = logging.getLogger(__name__)
+
+# The number of (post, user) pairs marked as read per UPDATE.
+READ_BATCH_SIZE = 250
+
+
+class ViewTracker:
+    """Buffer post views and reads to be written in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = Counter()
+        self._reads = {}
+        self._thread = None
+
+    def record_view(self, post: Post):
+        """
+        Record a view of the post for the trending counters.
+
+        :param post: The Post instance.
+        :return: None
+        """
+        with self._lock:
+            self._views[post.slug] += 1
+        self._recorded()
+
+    def record_read(self, post: Post, user: User):
+        """
+        Record that the user has read the post.
+
+        Repeated reads of the same post by the same user are merged,
+        keeping the time of the first read.
+
+        :param post: The unread Post instance.
+        :param user: The User instance.
+        :return: None
+        """
+        with self._lock:
+            self._reads.setdefault((post.id, user.id), timezone.now())
+        self._recorded()
+
+    def flush(self):
+        """
+        Write the buffered views and reads.
+
+        When a write fails, such as when SQLite reports the database is
+        locked, the events that weren't written are put back in the buffer
+        for the next flush.
+
+        :return: None
+        """
+        with self._lock:
+            views, self._views = self._views, Counter()
+            reads, self._reads = self._reads, {}
+        try:
+            self._write(views, reads)
+        except Exception:
+            with self._lock:
+                self._views.update(views)
+                # The buffered reads happened first, so their times win.
+                self._reads.update(reads)
+            raise
+
+    def _write(self, views: Counter, reads: dict):
+        """Write the events, removing each one from its buffer once written."""
+        recorded = Counter()
+        for slug in list(views):
+            trending.record_views(slug, views[slug])
+            recorded[slug] = views.pop(slug)
+        if recorded:
+            trending.update_leaderboard(recorded)
+        while reads:
+            batch = dict(islice(reads.items(), READ_BATCH_SIZE))
+            operations.mark_many_as_read(batch)
+            for key in batch:
+                del reads[key]
+
+    def start(self, interval: float):
+        """
+        Start the background thread that periodically flushes the buffer.
+
+        The thread is started lazily so that a forked worker process
+        starts its own thread the first time it records an event.
+
+        :param interval: The number of seconds between flushes.
+        :return: None
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="view-tracker", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _recorded(self):
+        interval = settings.VIEW_TRACKING_FLUSH_INTERVAL
+        if interval is None:
+            self.flush()
+        else:
+            self.start(interval)
+
+    def _run(self, interval: float):
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Unable to flush the tracked post views and reads.")
+
+
+tracker = ViewTracker()
@@ -0,0 +1,170 @@
+"""
+This file contains the view counters used to determine trending posts.
+
+Views are counted in per-minute buckets that are only ever changed with
+``cache.add`` and ``cache.incr``. Those are atomic on the cache backends
+meant for multi-process deployments (memcached, redis) as well as the
+local memory cache, so concurrent views are never lost to a
+read-modify-write race. The file and database backends implement ``incr``
+as a get followed by a set and shouldn't be used for these counters.
+
+The leaderboard ranks posts by exponentially decayed view counts. It's a
+short sorted list in a single cache key, so reading the top posts is one
+cache hit regardless of how many posts there are.
+"""
+
+import heapq
+import time
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.utils import timezone
+
+# The number of views within the window for a post to be trending.
+THRESHOLD = 5
+BUCKET_SECONDS = 60
+BUCKET_COUNT = 60
+WINDOW_SECONDS = BUCKET_SECONDS * BUCKET_COUNT
+
+LEADERBOARD_KEY = "post.trending.leaderboard"
+# The number of posts kept on the leaderboard.
+LEADERBOARD_SIZE = 100
+# The number of seconds for a view to count half as much.
+LEADERBOARD_HALF_LIFE = 3600
+# Scores that have decayed below this are dropped from the leaderboard.
+LEADERBOARD_MIN_SCORE = 0.01
+LEADERBOARD_LOCK_TIMEOUT = 10
+LEADERBOARD_LOCK_WAIT = 1.0
+
+
+def keys(slug: str, now=None) -> list[str]:
+    """
+    The cache keys of the view buckets within the trending window.
+
+    :param slug: The Post's slug.
+    :param now: The datetime to consider as the current time.
+    :return: The keys ordered from oldest to the current bucket.
+    """
+    now = now or timezone.now()
+    current = int(now.timestamp()) // BUCKET_SECONDS
+    return [
+        f"post.trending.{slug}.{bucket}"
+        for bucket in range(current - BUCKET_COUNT + 1, current + 1)
+    ]
+
+
+def increment(key: str, delta: int = 1) -> int:
+    """
+    Atomically increment the bucket, creating it when necessary.
+
+    :param key: The bucket's cache key.
+    :param delta: The number of views to add.
+    :return: The bucket's count after the increment.
+    """
+    # The bucket can expire or be evicted between add and incr, so
+    # try again until one of the atomic operations succeeds.
+    while True:
+        if cache.add(key, delta, timeout=WINDOW_SECONDS):
+            return delta
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            continue
+
+
+def record_views(slug: str, count: int = 1) -> int:
+    """
+    Record views of the post and count the views in the window.
+
+    :param slug: The Post's slug.
+    :param count: The number of views to record.
+    :return: The number of views within the window, including these ones.
+    """
+    *previous_keys, current_key = keys(slug)
+    return sum(cache.get_many(previous_keys).values()) + increment(current_key, count)
+
+
+def count_views(slug: str) -> int:
+    """
+    Count the views of the post within the window.
+
+    :param slug: The Post's slug.
+    :return: The number of views.
+    """
+    return sum(cache.get_many(keys(slug)).values())
+
+
+def is_trending(slug: str) -> bool:
+    """
+    Determine if the post has enough views within the window to be trending.
+
+    :param slug: The Post's slug.
+    :return: bool
+    """
+    return count_views(slug) > THRESHOLD
+
+
+def clear(slug: str):
+    """
+    Remove all the views of the post within the window.
+
+    :param slug: The Post's slug.
+    :return: None
+    """
+    cache.delete_many(keys(slug))
+
+
+def update_leaderboard(views: dict[str, int], now: float | None = None):
+    """
+    Decay the leaderboard's scores and add the views to them.
+
+    :param views: A mapping of Post slugs to the number of new views.
+    :param now: The timestamp to decay the scores to.
+    :return: None
+    """
+    now = now or time.time()
+    lock = f"{LEADERBOARD_KEY}.lock"
+    deadline = time.monotonic() + LEADERBOARD_LOCK_WAIT
+    # Losing an update to a concurrent writer only makes the leaderboard
+    # slightly less accurate, so give up on the lock rather than the views.
+    while not (locked := cache.add(lock, True, timeout=LEADERBOARD_LOCK_TIMEOUT)):
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.01)
+    try:
+        leaderboard = cache.get(LEADERBOARD_KEY) or {"updated": now, "scores": []}
+        decay = 0.5 ** ((now - leaderboard["updated"]) / LEADERBOARD_HALF_LIFE)
+        scores = {slug: score * decay for slug, score in leaderboard["scores"]}
+        for slug, count in views.items():
+            scores[slug] = scores.get(slug, 0) + count
+        cache.set(
+            LEADERBOARD_KEY,
+            {
+                "updated": now,
+                "scores": heapq.nlargest(
+                    LEADERBOARD_SIZE,
+                    (
+                        item
+                        for item in scores.items()
+                        if item[1] >= LEADERBOARD_MIN_SCORE
+                    ),
+                    key=itemgetter(1),
+                ),
+            },
+            timeout=None,
+        )
+    finally:
+        if locked:
+            cache.delete(lock)
+
+
+def top(count: int = 10) -> list[str]:
+    """
+    The slugs of the highest scoring posts on the leaderboard.
+
+    :param count: The number of slugs to return.
+    :return: The slugs ordered from the highest score.
+    """
+    if leaderboard := cache.get(LEADERBOARD_KEY):
+        return [slug for slug, _ in leaderboard["scores"][:count]]
+    return []
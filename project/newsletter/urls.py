@@ -8,6 +8,16 @@ urlpatterns = [
     path("", views.landing, name="landing"),
     path("account/", views.update_subscription, name="update_subscription"),
     path("analytics/", views.analytics, name="analytics"),
+    path(
+        "analytics/recompute/",
+        views.recompute_analytics,
+        name="recompute_analytics",
+    ),
+    path(
+        "analytics/export/notifications/",
+        views.export_notifications,
+        name="export_notifications",
+    ),
     path("post/unpublished/", views.unpublished_posts, name="unpublished_posts"),
     path("post/create/", views.create_post, name="create_post"),
     path("post/<slug>/update/", views.update_post, name="update_post"),
@@ -21,6 +31,7 @@ urlpatterns = [
         include(
             [
                 path("", views.list_posts, name="list_posts"),
+                path("search/", views.search_posts, name="search_posts"),
                 path("<slug>/", views.view_post, name="view_post"),
             ]
         ),
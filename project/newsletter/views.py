@@ -1,28 +1,53 @@
 import os
 import uuid
+from collections import defaultdict
 from datetime import timedelta
+from functools import partial
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.paginator import Paginator
-from django.db.models import Case, Count, F, Q, Value, When
-from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
 from martor.utils import LazyEncoder
 
-from project.newsletter import operations
+from project.newsletter import (
+    caching,
+    exports,
+    operations,
+    registry,
+    search,
+    tracking,
+    trending,
+)
+from project.newsletter.analytics import merge_histograms, summarize
 from project.newsletter.forms import PostForm, SubscriptionForm
-from project.newsletter.models import Category, Post, Subscription
+from project.newsletter.models import (
+    DailyRollup,
+    NotificationRollup,
+    Post,
+    Subscription,
+)
 
 LIST_POSTS_PAGE_SIZE = 100
+SEARCH_POSTS_PAGE_SIZE = 20
+SEARCH_CURSOR_SALT = "newsletter.search"
+POST_DETAIL_TIMEOUT = 600
+TRENDING_POSTS_COUNT = 10
+NOTIFICATION_POSTS_COUNT = 20
+ANALYTICS_KEY = "analytics"
+ANALYTICS_TIMEOUT = 60
 
 
 @require_http_methods(["GET"])
@@ -45,7 +70,22 @@ def landing(request):
         posts = posts.in_relevant_categories(subscription)
     else:
         posts = posts.public()
-    return render(request, "landing.html", {"posts": posts[:3]})
+    return render(
+        request,
+        "landing.html",
+        {"posts": posts[:3], "trending_posts": _trending_posts(request.user)},
+    )
+
+
+def _trending_posts(user):
+    """The top trending posts the user can view, ordered by their score."""
+    if not (slugs := trending.top(TRENDING_POSTS_COUNT)):
+        return []
+    posts = Post.objects.published().filter(slug__in=slugs)
+    if not user.is_authenticated:
+        posts = posts.public()
+    posts = {post.slug: post for post in posts}
+    return [posts[slug] for slug in slugs if slug in posts]
 
 
 @require_http_methods(["GET"])
@@ -70,22 +110,75 @@ def list_posts(request):
     )
 
 
+@require_http_methods(["GET"])
+def search_posts(request):
+    """
+    The post search view.
+
+    Results are paginated with a signed cursor of the last result's rank
+    and id rather than a page number, so later pages don't rank and skip
+    all of the earlier results.
+    """
+    text = request.GET.get("q", "").strip()
+    after = None
+    if cursor := request.GET.get("cursor"):
+        try:
+            after = tuple(signing.loads(cursor, salt=SEARCH_CURSOR_SALT))
+        except signing.BadSignature:
+            raise Http404
+    posts = Post.objects.published()
+    if not request.user.is_authenticated:
+        posts = posts.public()
+    results = []
+    if text:
+        results = search.search_posts(
+            posts, text, after=after, limit=SEARCH_POSTS_PAGE_SIZE + 1
+        )
+    next_cursor = None
+    if len(results) > SEARCH_POSTS_PAGE_SIZE:
+        results = results[:SEARCH_POSTS_PAGE_SIZE]
+        next_cursor = signing.dumps(list(results[-1]), salt=SEARCH_CURSOR_SALT)
+    found = (
+        posts.annotate_is_unread(request.user)
+        .prefetch_related("categories")
+        .in_bulk([post_id for _, post_id in results])
+    )
+    return render(
+        request,
+        "posts/search.html",
+        {
+            "query": text,
+            "posts": [found[post_id] for _, post_id in results if post_id in found],
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+def _get_public_post(slug):
+    """Fetch the published, public post to be cached for anonymous users."""
+    posts = Post.objects.published().public().annotate_is_unread(AnonymousUser())
+    return get_object_or_404(posts, slug=slug)
+
+
 @require_http_methods(["GET"])
 def view_post(request, slug):
     """
     The post detail view.
     """
-    post = cache.get(f"post.detail.{slug}", None)
-    if request.user.is_authenticated or not post:
+    key = f"post.detail.{slug}"
+    if request.user.is_authenticated:
         posts = Post.objects.published().annotate_is_unread(request.user)
-        if not request.user.is_authenticated:
-            posts = posts.public()
         post = get_object_or_404(posts, slug=slug)
         if post.is_unread:
-            operations.mark_as_read(post, request.user)
+            tracking.tracker.record_read(post, request.user)
         if post.is_public:
-            cache.set(f"post.detail.{slug}", post, timeout=600)
-    is_trending = operations.check_is_trending(post)
+            caching.set_value(key, post, timeout=POST_DETAIL_TIMEOUT)
+    else:
+        post = caching.get_or_rebuild(
+            key, partial(_get_public_post, slug), timeout=POST_DETAIL_TIMEOUT
+        )
+    is_trending = trending.is_trending(post.slug)
+    tracking.tracker.record_view(post)
     return render(
         request,
         "posts/detail.html",
@@ -187,79 +280,139 @@ def toggle_post_privacy(request, slug):
     return redirect("newsletter:list_posts")
 
 
+def _compute_analytics():
+    """
+    Compute the analytics page's numbers.
+
+    The numbers are sums over the DailyRollup and NotificationRollup rows,
+    so the windows are measured in whole days. The DailyRollup rows are kept
+    current by the receivers, while the NotificationRollup rows of posts
+    with changed notifications are refreshed first.
+    """
+    operations.refresh_changed_notification_rollups()
+    today = timezone.localdate()
+    windows = {days: Q(day__gte=today - timedelta(days=days)) for days in [30, 90, 180]}
+    sums = {
+        "posts_total": Sum("posts", default=0),
+        "posts_30_days": Sum("posts", filter=windows[30], default=0),
+        "posts_90_days": Sum("posts", filter=windows[90], default=0),
+        "posts_180_days": Sum("posts", filter=windows[180], default=0),
+        "subscriptions_total": Sum("subscriptions", default=0),
+        "subscriptions_30_days": Sum("subscriptions", filter=windows[30], default=0),
+        "subscriptions_90_days": Sum("subscriptions", filter=windows[90], default=0),
+        "subscriptions_180_days": Sum("subscriptions", filter=windows[180], default=0),
+    }
+    totals = DailyRollup.objects.totals().aggregate(**sums)
+    category_rollups = {
+        rollup["category_id"]: rollup
+        for rollup in DailyRollup.objects.per_category()
+        .values("category_id")
+        .annotate(**sums)
+        .order_by()
+    }
+    # Categories without posts or subscriptions have no rollups.
+    subscription_category_aggregates = {}
+    post_category_aggregates = {}
+    for category in registry.by_id().values():
+        rollup = category_rollups.get(category.id, {})
+        subscription_category_aggregates[category.title] = rollup.get(
+            "subscriptions_total", 0
+        )
+        post_category_aggregates[category.title] = rollup.get("posts_total", 0)
+
+    notification_post_stats = [
+        {"title": title, **summarize(sent, read, histogram)}
+        for title, sent, read, histogram in NotificationRollup.objects.order_by(
+            Coalesce("post__publish_at", "post__created").desc()
+        ).values_list("post__title", "sent", "read", "latency_histogram")[
+            :NOTIFICATION_POSTS_COUNT
+        ]
+    ]
+    notification_rollups = defaultdict(lambda: {"sent": 0, "read": 0, "histograms": []})
+    for title, sent, read, histogram in (
+        NotificationRollup.objects.filter(post__categories__isnull=False)
+        .order_by("post__categories__title")
+        .values_list("post__categories__title", "sent", "read", "latency_histogram")
+    ):
+        notification_rollups[title]["sent"] += sent
+        notification_rollups[title]["read"] += read
+        notification_rollups[title]["histograms"].append(histogram)
+    notification_category_stats = [
+        {
+            "title": title,
+            **summarize(
+                rollup["sent"],
+                rollup["read"],
+                merge_histograms(rollup["histograms"]),
+            ),
+        }
+        for title, rollup in notification_rollups.items()
+    ]
+
+    return {
+        "computed": timezone.now(),
+        "aggregates": {
+            "Subscriptions": totals["subscriptions_total"],
+            "Subscriptions (30 days)": totals["subscriptions_30_days"],
+            "Subscriptions (90 days)": totals["subscriptions_90_days"],
+            "Subscriptions (180 days)": totals["subscriptions_180_days"],
+            "Posts": totals["posts_total"],
+            "Posts (30 days)": totals["posts_30_days"],
+            "Posts (90 days)": totals["posts_90_days"],
+            "Posts (180 days)": totals["posts_180_days"],
+        },
+        "subscription_category_aggregates": subscription_category_aggregates,
+        "post_category_aggregates": post_category_aggregates,
+        "notification_post_stats": notification_post_stats,
+        "notification_category_stats": notification_category_stats,
+    }
+
+
 @staff_member_required(login_url=settings.LOGIN_URL)
 @require_http_methods(["GET"])
 def analytics(request):
     """
-    The post detail view.
+    The staff analytics view.
+
+    The numbers are cached and refreshed in the background once they
+    become stale, so only the first request waits on computing them.
     """
-    now = timezone.now()
-    subscription_aggregates = Subscription.objects.all().aggregate(
-        subscriptions=Count("user", distinct=True, filter=Q(categories__isnull=False)),
-        subscriptions_30_days=Count(
-            "id",
-            filter=Q(categories__isnull=False, created__gte=now - timedelta(days=30)),
-            distinct=True,
-        ),
-        subscriptions_90_days=Count(
-            "id",
-            filter=Q(categories__isnull=False, created__gte=now - timedelta(days=90)),
-            distinct=True,
-        ),
-        subscriptions_180_days=Count(
-            "id",
-            filter=Q(categories__isnull=False, created__gte=now - timedelta(days=180)),
-            distinct=True,
-        ),
-    )
-    subscription_category_aggregates = dict(
-        Category.objects.annotate(count=Count("subscriptions"))
-        .order_by("title")
-        .values_list("title", "count")
-    )
-    post_aggregates = Post.objects.all().aggregate(
-        posts=Count("id"),
-        posts_30_days=Count(
-            "id",
-            filter=Q(created__gte=now - timedelta(days=30)),
-        ),
-        posts_90_days=Count(
-            "id",
-            filter=Q(created__gte=now - timedelta(days=90)),
-        ),
-        posts_180_days=Count(
-            "id",
-            filter=Q(created__gte=now - timedelta(days=180)),
-        ),
-    )
-    post_category_aggregates = dict(
-        Category.objects.annotate(count=Count("posts"))
-        .order_by("title")
-        .values_list("title", "count")
+    context = caching.get_or_rebuild(
+        ANALYTICS_KEY, _compute_analytics, timeout=ANALYTICS_TIMEOUT, background=True
     )
+    return render(request, "staff/analytics.html", context)
 
-    return render(
-        request,
-        "staff/analytics.html",
-        {
-            "aggregates": {
-                "Subscriptions": subscription_aggregates["subscriptions"],
-                "Subscriptions (30 days)": subscription_aggregates[
-                    "subscriptions_30_days"
-                ],
-                "Subscriptions (90 days)": subscription_aggregates[
-                    "subscriptions_90_days"
-                ],
-                "Subscriptions (180 days)": subscription_aggregates[
-                    "subscriptions_180_days"
-                ],
-                "Posts": post_aggregates["posts"],
-                "Posts (30 days)": post_aggregates["posts_30_days"],
-                "Posts (90 days)": post_aggregates["posts_90_days"],
-                "Posts (180 days)": post_aggregates["posts_180_days"],
-            },
-            "subscription_category_aggregates": subscription_category_aggregates,
-            "post_category_aggregates": post_category_aggregates,
+
+@staff_member_required(login_url=settings.LOGIN_URL)
+@require_http_methods(["POST"])
+def recompute_analytics(request):
+    """
+    Recompute the cached analytics and redirect back to the analytics view.
+
+    The changed notification rollups are refreshed, but the daily rollups
+    are only summed. Rebuilding them after bulk changes is left to the
+    refresh_analytics command.
+    """
+    caching.set_value(ANALYTICS_KEY, _compute_analytics(), timeout=ANALYTICS_TIMEOUT)
+    messages.success(request, "The analytics have been recomputed from the rollups.")
+    return redirect("newsletter:analytics")
+
+
+@staff_member_required(login_url=settings.LOGIN_URL)
+@require_http_methods(["GET"])
+def export_notifications(request):
+    """
+    Stream the notification log as CSV or JSONL.
+    """
+    export_format = request.GET.get("format", "csv")
+    if export_format not in exports.FORMATS:
+        raise Http404
+    lines, content_type = exports.FORMATS[export_format]
+    return StreamingHttpResponse(
+        lines(exports.iterate_notifications()),
+        content_type=content_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="notifications.{export_format}"'
         },
     )
 
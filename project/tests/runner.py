@@ -27,4 +27,6 @@ class ProjectTestRunner(DiscoverRunner):
 
 TEST_SETTINGS = {
     "PASSWORD_HASHERS": ["django.contrib.auth.hashers.MD5PasswordHasher"],
+    # Write tracked views and reads immediately so tests can assert on them.
+    "VIEW_TRACKING_FLUSH_INTERVAL": None,
 }